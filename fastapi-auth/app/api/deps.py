@@ -1,12 +1,16 @@
+import hmac
+import math
 from typing import Optional
-from fastapi import Depends, HTTPException, status, Request
+from fastapi import Depends, HTTPException, status, Request, Header, Query
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_session
-from app.core.security import decode_token
+from app.core.security import decode_supabase_token, InvalidTokenError
 from app.crud.profile import crud_profile
 from app.core.config import settings
-from jose import jwt, JWTError
+from app.core import rate_limit as limiter
+from app.core.constants import MSG_RATE_LIMITED
+from app.schemas.profile import INCLUDE_OPTIONS
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
@@ -16,22 +20,90 @@ async def get_db() -> AsyncSession:
         yield s
 
 
-async def get_current_user(request: Request, db: AsyncSession = Depends(get_db)):
+async def _body_email(request: Request) -> Optional[str]:
+    # FastAPI has already read the body for the endpoint, so this is the cached copy
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    email = body.get("email") if isinstance(body, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+def rate_limit(scope: str, *, by_email: bool = True):
+    """
+    Dependency factory: token buckets per client IP and (optionally) per email in
+    the JSON body. Runs before the endpoint, so a rejected request never reaches
+    bcrypt or GoTrue.
+    """
+    async def dependency(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        wait = await limiter.check(
+            scope, "ip", limiter.client_ip(request.scope),
+            settings.RATE_LIMIT_IP_PER_MINUTE, settings.RATE_LIMIT_IP_BURST,
+        )
+        if not wait and by_email:
+            email = await _body_email(request)
+            if email:
+                wait = await limiter.check(
+                    scope, "email", email,
+                    settings.RATE_LIMIT_EMAIL_PER_MINUTE, settings.RATE_LIMIT_EMAIL_BURST,
+                )
+        if wait:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=MSG_RATE_LIMITED,
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+    return dependency
+
+
+def get_include(
+    include: Optional[str] = Query(
+        default=None,
+        description="Comma-separated related data to embed: trainer, client, organization",
+    ),
+) -> frozenset:
+    if not include:
+        return frozenset()
+    requested = frozenset(part.strip() for part in include.split(",") if part.strip())
+    unknown = requested - INCLUDE_OPTIONS
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown include value(s): {', '.join(sorted(unknown))}",
+        )
+    return requested
+
+
+async def get_current_user_id(request: Request) -> str:
+    # Verifies the bearer token only; no DB access
     auth = request.headers.get("authorization")
     if not auth or not auth.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token")
 
     token = auth.split(" ", 1)[1]
     try:
-        payload = jwt.decode(token, settings.SUPABASE_JWT_SECRET, algorithms=["HS256"])
+        payload = decode_supabase_token(token)
         user_id: Optional[str] = payload.get("sub") or payload.get("user_id")
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token payload")
-    except JWTError:
+    except InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    return user_id
+
 
+async def get_current_user(user_id: str = Depends(get_current_user_id), db: AsyncSession = Depends(get_db)):
     profile = await crud_profile.get_by_id(db, user_id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
 
-    return profile
\ No newline at end of file
+    return profile
+
+
+async def require_admin(x_admin_key: Optional[str] = Header(default=None)) -> None:
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin API disabled")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin key")
@@ -0,0 +1,84 @@
+import csv
+import io
+import tempfile
+from datetime import datetime, timezone
+from typing import AsyncIterator, Literal
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
+import logging
+
+from app.api.deps import require_admin
+from app.core.config import settings
+from app.schemas.profile import ProfileImportReport
+from app.schemas.response import ApiResponse
+from app.services.profile_export import MEDIA_TYPES, export_profiles
+from app.services.profile_import import import_profiles, read_records
+from app.utils.responses import ok, fail, ApiJSONResponse
+from app.core.constants import MSG_SUCCESS, MSG_DB_UNAVAILABLE, MSG_INVALID_IMPORT_FILE
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+async def _prepend(first: bytes, rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    yield first
+    async for chunk in rest:
+        yield chunk
+
+
+# Full export of profiles with trainer/client fields, streamed as NDJSON or CSV
+@router.get("/profiles/export")
+async def export_profiles_endpoint(format: Literal["ndjson", "csv"] = Query(default="ndjson")):
+    chunks = export_profiles(format)
+    try:
+        # fetch the first batch before committing to a 200, so a DB outage is still a 502
+        first = await chunks.__anext__()
+    except Exception:
+        logger.exception("DB connect/query failed", extra={"format": format})
+        await chunks.aclose()
+        return ApiJSONResponse(
+            status_code=502,
+            content=fail(code=502, message=MSG_DB_UNAVAILABLE),
+        )
+
+    filename = f"profiles-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.{format}"
+    return StreamingResponse(
+        _prepend(first, chunks),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# Bulk import of profiles from a CSV / NDJSON request body (see app/services/profile_import.py).
+# Runs within the request; for migrations that outgrow the platform's request
+# timeout use `python -m app.services.profile_import` instead.
+@router.post("/profiles/import", response_model=ApiResponse[ProfileImportReport])
+async def import_profiles_endpoint(request: Request, format: Literal["ndjson", "csv"] = Query(default="ndjson")):
+    # spool the upload so a large file spills to disk instead of memory
+    with tempfile.SpooledTemporaryFile(max_size=settings.IMPORT_SPOOL_MAX_MEMORY) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        text = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+        try:
+            report = await import_profiles(read_records(text, format))
+        except (UnicodeDecodeError, csv.Error):
+            return ApiJSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content=fail(code=status.HTTP_400_BAD_REQUEST, message=MSG_INVALID_IMPORT_FILE)
+            )
+        except Exception:
+            logger.exception("DB connect/query failed", extra={"format": format})
+            return ApiJSONResponse(
+                status_code=502,
+                content=fail(code=502, message=MSG_DB_UNAVAILABLE),
+            )
+        finally:
+            text.detach()
+
+    return ApiJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=ok(report, message=MSG_SUCCESS, code=status.HTTP_200_OK)
+    )
@@ -1,37 +1,58 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
-import logging, traceback
+import asyncio
+import logging
+import math
 
-from app.api.deps import get_db, get_current_user
-from app.schemas.profile import ProfileRegister, ProfileOut, Token, Login, AuthData
+from app.api.deps import get_db, get_current_user_id, get_include, require_admin, rate_limit
+from app.core.config import settings
+from app.schemas.profile import (
+    ProfileRegister, ProfileOut, ProfileDetailOut, Token, Login, AuthData, RefreshRequest,
+    ProfileRegisterBatch, RegisterBatchItemResult, RegisterBatchResult,
+)
 from app.schemas.response import ApiResponse
-from app.crud.profile import crud_profile
-from app.core.security import pwd_context
-from app.core.security import get_password_hash, verify_password, create_access_token
-from app.services.supabase_auth import login_supabase_user, SupabaseAuthError
-from app.utils.responses import ok, fail
-from app.core.constants import MSG_SUCCESS, MSG_REGISTERED, MSG_USER__EXISTS, MSG_INVALID_CREDENTIALS, MSG_NO_PROFILE
+from app.crud.profile import crud_profile, ProfileAlreadyExistsError
+from app.core.security import hash_password_async, verify_password_async, create_supabase_access_token, PasswordHasherBusy
+from app.services.supabase_auth import login_supabase_user, SupabaseAuthError, SupabaseUserExistsError
+from app.services.supabase_auth import refresh_supabase_session, SupabaseInvalidGrantError, SupabaseUnavailableError
+from app.utils.responses import ok, fail, ApiJSONResponse
+from app.core.constants import MSG_SUCCESS, MSG_REGISTERED, MSG_USER__EXISTS, MSG_INVALID_CREDENTIALS, MSG_NO_PROFILE, MSG_BUSY
+from app.core.constants import MSG_BATCH_TOO_LARGE, MSG_DUPLICATE_IN_BATCH, MSG_CONFIRMATION_REQUIRED
+from app.core.constants import MSG_INVALID_REFRESH_TOKEN, MSG_UPSTREAM_ERROR, MSG_DB_UNAVAILABLE, MSG_UPSTREAM_UNAVAILABLE
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(tags=["auth"])
 
+
+def _upstream_unavailable(e: SupabaseUnavailableError) -> ApiJSONResponse:
+    # GoTrue is down or the breaker is open: tell the client when to come back
+    return ApiJSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=fail(code=status.HTTP_503_SERVICE_UNAVAILABLE, message=MSG_UPSTREAM_UNAVAILABLE),
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+    )
+
 # Register new user
-@router.post("/register", response_model=ApiResponse[ProfileOut], status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/register",
+    response_model=ApiResponse[ProfileOut],
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("register"))],
+)
 async def register(payload: ProfileRegister, db: AsyncSession = Depends(get_db)):
-    # Check if email already exists
-    existing = await crud_profile.get_by_email(db, email=payload.email)
-    if existing:
-        # raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content=fail(code=status.HTTP_400_BAD_REQUEST, message=MSG_USER__EXISTS).model_dump() #converts the Pydantic model into a plain dict so JSONResponse can serialize it
+    # hash the password off the event loop
+    try:
+        hashed = await hash_password_async(payload.password)
+    except PasswordHasherBusy:
+        return ApiJSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=fail(code=status.HTTP_503_SERVICE_UNAVAILABLE, message=MSG_BUSY),
+            headers={"Retry-After": "1"},
         )
     try:
-        # hash the password
-        hashed = pwd_context.hash(payload.password)
-
         # Create profile
         result = await crud_profile.create_profile_with_role(
             db,
@@ -44,52 +65,178 @@ async def register(payload: ProfileRegister, db: AsyncSession = Depends(get_db))
             trainer_fields=(payload.trainer.model_dump() if payload.trainer else None),
             client_fields=(payload.client.model_dump() if payload.client else None),
         )
-    except Exception as e:
+    except SupabaseUnavailableError as e:
+        return _upstream_unavailable(e)
+    except (SupabaseUserExistsError, ProfileAlreadyExistsError):
+        # duplicate emails are caught by GoTrue / the unique constraint, no pre-check SELECT
+        return ApiJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=fail(code=status.HTTP_400_BAD_REQUEST, message=MSG_USER__EXISTS)
+        )
+    except Exception:
         await db.rollback()
-        logging.error(f"DB connect/query failed for email={payload.email}: {e}\n{traceback.format_exc()}")
-        return JSONResponse(
+        logger.exception("DB connect/query failed", extra={"email": payload.email})
+        return ApiJSONResponse(
         status_code=502,
-        content=fail(code=502, message="Database unavailable: {e}").model_dump(mode="json"),
+        content=fail(code=502, message="Database unavailable: {e}"),
     )
     profile_model = result.profile
     # 4) serialize to output shape
     profile_out = ProfileOut.model_validate(profile_model, from_attributes=True)
     # return the created profile data
-    return JSONResponse(
+    return ApiJSONResponse(
         status_code=status.HTTP_201_CREATED,
-        content=ok(profile_out, message=MSG_REGISTERED, code=status.HTTP_201_CREATED).model_dump()
+        content=ok(
+            profile_out,
+            message=(MSG_REGISTERED if result.token is not None else MSG_CONFIRMATION_REQUIRED),
+            code=status.HTTP_201_CREATED,
+        )
     )
 
-#  Login User
-@router.post("/login")
-async def login_json(payload: Login, db: AsyncSession = Depends(get_db)):
-    # check credentials with supabase
-    try:
-        access_token, refresh_token, user_id = await login_supabase_user(
-            email=payload.email,
-            password=payload.password,
-        )
-    except SupabaseAuthError:
-        # return if invalid credentials
-        return JSONResponse(
+# Register many users at once (admin only)
+@router.post(
+    "/register/batch",
+    response_model=ApiResponse[RegisterBatchResult],
+    dependencies=[Depends(require_admin)],
+)
+async def register_batch(payload: ProfileRegisterBatch, db: AsyncSession = Depends(get_db)):
+    items = payload.items
+    if len(items) > settings.REGISTER_BATCH_MAX_ITEMS:
+        return ApiJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
-            content=fail(code=status.HTTP_400_BAD_REQUEST, message=MSG_INVALID_CREDENTIALS).model_dump()
+            content=fail(code=status.HTTP_400_BAD_REQUEST, message=MSG_BATCH_TOO_LARGE)
         )
-    # Fetch user profile from DB
-    try:
-        profile = await crud_profile.get_by_id(db, user_id)
-    except Exception as e:
-        logging.error(f"DB connect/query failed for user_id={user_id}: {e}\n{traceback.format_exc()}")
-        return JSONResponse(
-        status_code=502,
-        content=fail(code=502, message="Database unavailable: {e}").model_dump(mode="json"),
+
+    results: dict = {}
+    unique = []
+    seen = set()
+    for i, item in enumerate(items):
+        key = item.email.lower()
+        if key in seen:
+            results[i] = RegisterBatchItemResult(index=i, email=item.email, success=False, message=MSG_DUPLICATE_IN_BATCH)
+        else:
+            seen.add(key)
+            unique.append((i, item))
+
+    # hash in parallel, but never queue more than the pool has workers
+    sem = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+
+    async def hash_one(password: str) -> str:
+        async with sem:
+            return await hash_password_async(password)
+
+    hashes = await asyncio.gather(*(hash_one(item.password) for _, item in unique), return_exceptions=True)
+    entries = []
+    for (i, item), hashed in zip(unique, hashes):
+        if isinstance(hashed, BaseException):
+            results[i] = RegisterBatchItemResult(index=i, email=item.email, success=False, message=MSG_BUSY)
+            continue
+        entries.append(dict(
+            index=i,
+            name=item.name,
+            email=item.email,
+            plain_password=item.password,
+            hashed_password=hashed,
+            phone=item.phone,
+            user_type=item.user_type,
+            trainer_fields=(item.trainer.model_dump() if item.trainer else None),
+            client_fields=(item.client.model_dump() if item.client else None),
+        ))
+
+    if entries:
+        try:
+            for r in await crud_profile.create_many_with_role(db, entries):
+                results[r.index] = r
+        except Exception:
+            logger.exception("DB connect/query failed", extra={"batch_size": len(entries)})
+            return ApiJSONResponse(
+                status_code=502,
+                content=fail(code=502, message="Database unavailable"),
+            )
+
+    ordered = [results[i] for i in range(len(items))]
+    created = sum(1 for r in ordered if r.success)
+    data = RegisterBatchResult(created=created, failed=len(ordered) - created, results=ordered)
+    return ApiJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=ok(data, message=MSG_SUCCESS, code=status.HTTP_200_OK)
     )
+
+async def _verify_locally(db: AsyncSession, payload: Login):
+    """
+    LOGIN_MODE=local: check the password against profiles.password off the event loop.
+    Returns the profile on a match, None when GoTrue has to decide instead.
+    """
+    # a miss falls through to GoTrue anyway, so a lagging replica needs no second lookup
+    profile = await crud_profile.get_by_email(db, payload.email, retry_miss=False)
+    if profile is None or not profile.password:
+        return None
+    try:
+        if await verify_password_async(payload.password, profile.password):
+            return profile
+    except ValueError:
+        # stored value is not a hash passlib recognises
+        logger.warning("Unusable local password hash", extra={"user_id": str(profile.id)})
+    # a mismatch may just mean the password was changed in Supabase
+    return None
+
+#  Login User
+@router.post("/login", dependencies=[Depends(rate_limit("login"))])
+async def login_json(payload: Login, db: AsyncSession = Depends(get_db), include: frozenset = Depends(get_include)):
+    profile = None
+    if settings.LOGIN_MODE == "local":
+        try:
+            profile = await _verify_locally(db, payload)
+        except PasswordHasherBusy:
+            return ApiJSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content=fail(code=status.HTTP_503_SERVICE_UNAVAILABLE, message=MSG_BUSY),
+                headers={"Retry-After": "1"},
+            )
+        except Exception:
+            logger.exception("DB connect/query failed", extra={"email": payload.email})
+            return ApiJSONResponse(
+                status_code=502,
+                content=fail(code=502, message=MSG_DB_UNAVAILABLE),
+            )
+
+    if profile is not None:
+        # verified locally: no GoTrue round trip, token signed with the Supabase JWT key
+        user_id = str(profile.id)
+        access_token = create_supabase_access_token(user_id, email=profile.email)
+        refresh_token = None
+    else:
+        # check credentials with supabase
+        try:
+            access_token, refresh_token, user_id = await login_supabase_user(
+                email=payload.email,
+                password=payload.password,
+            )
+        except SupabaseUnavailableError as e:
+            return _upstream_unavailable(e)
+        except SupabaseAuthError:
+            # return if invalid credentials
+            return ApiJSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content=fail(code=status.HTTP_400_BAD_REQUEST, message=MSG_INVALID_CREDENTIALS)
+            )
+
+    # Fetch user profile from DB (the local path already has it unless relationships were requested)
+    if profile is None or include:
+        try:
+            profile = await crud_profile.get_by_id(db, user_id, include=include)
+        except Exception:
+            logger.exception("DB connect/query failed", extra={"user_id": user_id})
+            return ApiJSONResponse(
+            status_code=502,
+            content=fail(code=502, message="Database unavailable: {e}"),
+        )
     # profile = await crud_profile.get_by_id(db, user_id)
     # if profile not found, return error
     if not profile:
-        return JSONResponse(
+        return ApiJSONResponse(
             status_code=status.HTTP_404_NOT_FOUND,
-            content=fail(code=status.HTTP_404_NOT_FOUND, message=MSG_NO_PROFILE).model_dump()
+            content=fail(code=status.HTTP_404_NOT_FOUND, message=MSG_NO_PROFILE)
         )
     
     # Create token payload
@@ -100,15 +247,57 @@ async def login_json(payload: Login, db: AsyncSession = Depends(get_db)):
     )
 
     # ORM -> Pydantic
-    profile_out = ProfileOut.model_validate(profile, from_attributes=True)
+    if include:
+        profile_out = ProfileDetailOut.from_profile(profile, include)
+    else:
+        profile_out = ProfileOut.model_validate(profile, from_attributes=True)
 
-    data = AuthData(token=token_payload, profile=profile_out).model_dump(mode="json")
+    data = AuthData(token=token_payload, profile=profile_out)
     # return the profile data
-    return JSONResponse(
+    return ApiJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=ok(data, message=MSG_SUCCESS, code=status.HTTP_200_OK)
+    )
+
+# Exchange a refresh token for a new access token
+@router.post("/refresh", response_model=ApiResponse[Token], dependencies=[Depends(rate_limit("refresh", by_email=False))])
+async def refresh(payload: RefreshRequest):
+    try:
+        session = await refresh_supabase_session(payload.refresh_token)
+    except SupabaseUnavailableError as e:
+        return _upstream_unavailable(e)
+    except SupabaseInvalidGrantError:
+        return ApiJSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content=fail(code=status.HTTP_401_UNAUTHORIZED, message=MSG_INVALID_REFRESH_TOKEN)
+        )
+    except Exception:
+        logger.exception("Supabase refresh failed")
+        return ApiJSONResponse(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            content=fail(code=status.HTTP_502_BAD_GATEWAY, message=MSG_UPSTREAM_ERROR)
+        )
+
+    token_payload = Token(
+        access_token=session.access_token,
+        token_type="bearer",
+        refresh_token=session.refresh_token,
+    )
+    return ApiJSONResponse(
         status_code=status.HTTP_200_OK,
-        content=ok(data, message=MSG_SUCCESS, code=status.HTTP_200_OK).model_dump(mode="json")
+        content=ok(token_payload, message=MSG_SUCCESS, code=status.HTTP_200_OK)
     )
 
-@router.get("/me", response_model=ProfileOut)
-async def me(current_user = Depends(get_current_user)):
-    return current_user
+@router.get("/me", response_model=ProfileDetailOut, response_model_exclude_unset=True)
+async def me(
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+    include: frozenset = Depends(get_include),
+):
+    profile = await crud_profile.get_by_id(db, user_id, include=include)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if include:
+        return ProfileDetailOut.from_profile(profile, include)
+    # validate as the base shape so unrequested relationships are never touched
+    return ProfileOut.model_validate(profile, from_attributes=True)
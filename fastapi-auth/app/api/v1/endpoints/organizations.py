@@ -0,0 +1,154 @@
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from app.api.deps import get_db, get_current_user_id, require_admin
+from app.core.config import settings
+from app.schemas.organization import (
+    OrganizationTrainerPage,
+    OrganizationSummaryOut,
+    OrganizationSummaryPage,
+    OrganizationStatsRebuildResult,
+)
+from app.schemas.response import ApiResponse
+from app.crud.organization import crud_organization
+from app.utils.responses import ok, fail, ApiJSONResponse
+from app.core.constants import MSG_SUCCESS, MSG_NO_ORGANIZATION, MSG_INVALID_CURSOR, MSG_DB_UNAVAILABLE
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["organizations"])
+
+# All organizations with trainer headcount / average experience, keyset-paginated
+@router.get("", response_model=ApiResponse[OrganizationSummaryPage])
+async def list_organizations(
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    limit: int = Query(default=settings.ORG_LIST_PAGE_SIZE, ge=1, le=settings.ORG_LIST_MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    _user_id: str = Depends(get_current_user_id),
+):
+    try:
+        items, next_cursor = await crud_organization.list_summaries(db, limit=limit, cursor=cursor)
+    except ValueError:
+        return ApiJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=fail(code=status.HTTP_400_BAD_REQUEST, message=MSG_INVALID_CURSOR)
+        )
+    except Exception:
+        logger.exception("DB connect/query failed")
+        return ApiJSONResponse(
+            status_code=502,
+            content=fail(code=502, message=MSG_DB_UNAVAILABLE),
+        )
+
+    data = OrganizationSummaryPage(items=items, next_cursor=next_cursor)
+    return ApiJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=ok(data, message=MSG_SUCCESS, code=status.HTTP_200_OK)
+    )
+
+
+# Recompute the stats counters from the trainers table (admin only); all orgs unless org_id is given
+@router.post(
+    "/stats/rebuild",
+    response_model=ApiResponse[OrganizationStatsRebuildResult],
+    dependencies=[Depends(require_admin)],
+)
+async def rebuild_organization_stats(
+    org_id: Optional[UUID] = Query(default=None),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        count = await crud_organization.rebuild_stats(db, str(org_id) if org_id else None)
+    except Exception:
+        logger.exception("DB connect/query failed", extra={"org_id": str(org_id) if org_id else None})
+        return ApiJSONResponse(
+            status_code=502,
+            content=fail(code=502, message=MSG_DB_UNAVAILABLE),
+        )
+
+    data = OrganizationStatsRebuildResult(organizations=count)
+    return ApiJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=ok(data, message=MSG_SUCCESS, code=status.HTTP_200_OK)
+    )
+
+
+# One organization with trainer headcount / average experience
+@router.get("/{org_id}", response_model=ApiResponse[OrganizationSummaryOut])
+async def get_organization(
+    org_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    _user_id: str = Depends(get_current_user_id),
+):
+    try:
+        summary = await crud_organization.get_summary(db, str(org_id))
+    except Exception:
+        logger.exception("DB connect/query failed", extra={"org_id": str(org_id)})
+        return ApiJSONResponse(
+            status_code=502,
+            content=fail(code=502, message=MSG_DB_UNAVAILABLE),
+        )
+    if summary is None:
+        return ApiJSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content=fail(code=status.HTTP_404_NOT_FOUND, message=MSG_NO_ORGANIZATION)
+        )
+
+    return ApiJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=ok(summary, message=MSG_SUCCESS, code=status.HTTP_200_OK)
+    )
+
+
+# Trainer directory of one organization (admin only), keyset-paginated
+@router.get(
+    "/{org_id}/trainers",
+    response_model=ApiResponse[OrganizationTrainerPage],
+    dependencies=[Depends(require_admin)],
+)
+async def list_organization_trainers(
+    org_id: UUID,
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    limit: int = Query(default=settings.ORG_TRAINERS_PAGE_SIZE, ge=1, le=settings.ORG_TRAINERS_MAX_PAGE_SIZE),
+    min_years_exp: Optional[int] = Query(default=None, ge=0),
+    max_years_exp: Optional[int] = Query(default=None, ge=0),
+    certification: Optional[List[str]] = Query(default=None, description="Repeatable; trainers must hold all of them"),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        items, next_cursor = await crud_organization.list_trainers(
+            db,
+            str(org_id),
+            limit=limit,
+            cursor=cursor,
+            min_years_exp=min_years_exp,
+            max_years_exp=max_years_exp,
+            certifications=certification,
+        )
+        # an empty first page may mean the organization does not exist at all
+        if not items and not cursor and not await crud_organization.exists(db, str(org_id)):
+            return ApiJSONResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                content=fail(code=status.HTTP_404_NOT_FOUND, message=MSG_NO_ORGANIZATION)
+            )
+    except ValueError:
+        return ApiJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=fail(code=status.HTTP_400_BAD_REQUEST, message=MSG_INVALID_CURSOR)
+        )
+    except Exception:
+        logger.exception("DB connect/query failed", extra={"org_id": str(org_id)})
+        return ApiJSONResponse(
+            status_code=502,
+            content=fail(code=502, message=MSG_DB_UNAVAILABLE),
+        )
+
+    data = OrganizationTrainerPage(items=items, next_cursor=next_cursor)
+    return ApiJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=ok(data, message=MSG_SUCCESS, code=status.HTTP_200_OK)
+    )
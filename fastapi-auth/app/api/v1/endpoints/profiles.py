@@ -0,0 +1,92 @@
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from app.api.deps import get_db, get_include, require_admin
+from app.core.config import settings
+from app.schemas.profile import ProfileOut, ProfileDetailOut, ProfileLookupRequest, ProfileLookupResult, ProfileSearchResult
+from app.schemas.response import ApiResponse
+from app.crud.profile import crud_profile
+from app.utils.responses import ok, fail, ApiJSONResponse
+from app.core.constants import MSG_SUCCESS, MSG_LOOKUP_TOO_LARGE, MSG_DB_UNAVAILABLE, MSG_SEARCH_TOO_SHORT
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["profiles"])
+
+# Staff search by partial name, email or phone (admin only), ranked by relevance
+@router.get(
+    "/search",
+    response_model=ApiResponse[ProfileSearchResult],
+    dependencies=[Depends(require_admin)],
+)
+async def search_profiles(
+    q: str = Query(max_length=200),
+    limit: int = Query(default=settings.PROFILE_SEARCH_LIMIT, ge=1, le=settings.PROFILE_SEARCH_MAX_LIMIT),
+    db: AsyncSession = Depends(get_db),
+):
+    # checked after trimming: "   " or " a " would otherwise match (and rank) every row
+    q = q.strip()
+    if len(q) < settings.PROFILE_SEARCH_MIN_LENGTH:
+        return ApiJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=fail(code=status.HTTP_400_BAD_REQUEST, message=MSG_SEARCH_TOO_SHORT)
+        )
+    try:
+        items = await crud_profile.search(db, q, limit=limit)
+    except Exception:
+        logger.exception("DB connect/query failed", extra={"q_length": len(q)})
+        return ApiJSONResponse(
+            status_code=502,
+            content=fail(code=502, message=MSG_DB_UNAVAILABLE),
+        )
+
+    data = ProfileSearchResult(items=items)
+    return ApiJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=ok(data, message=MSG_SUCCESS, code=status.HTTP_200_OK)
+    )
+
+
+# Resolve many user ids to profiles in one query (service-to-service, admin key only)
+@router.post(
+    "/lookup",
+    response_model=ApiResponse[ProfileLookupResult],
+    dependencies=[Depends(require_admin)],
+)
+async def lookup_profiles(
+    payload: ProfileLookupRequest,
+    db: AsyncSession = Depends(get_db),
+    include: frozenset = Depends(get_include),
+):
+    if len(payload.ids) > settings.PROFILE_LOOKUP_MAX_IDS:
+        return ApiJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=fail(code=status.HTTP_400_BAD_REQUEST, message=MSG_LOOKUP_TOO_LARGE)
+        )
+
+    ids = [str(i) for i in payload.ids]
+    try:
+        rows = await crud_profile.get_many_by_ids(db, ids, include=include)
+    except Exception:
+        logger.exception("DB connect/query failed", extra={"lookup_size": len(ids)})
+        return ApiJSONResponse(
+            status_code=502,
+            content=fail(code=502, message="Database unavailable"),
+        )
+
+    profiles, missing = [], []
+    for id, profile in zip(ids, rows):
+        if profile is None:
+            missing.append(id)
+        elif include:
+            profiles.append(ProfileDetailOut.from_profile(profile, include))
+        else:
+            profiles.append(ProfileOut.model_validate(profile, from_attributes=True))
+
+    data = ProfileLookupResult(profiles=profiles, missing=missing)
+    return ApiJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=ok(data, message=MSG_SUCCESS, code=status.HTTP_200_OK)
+    )
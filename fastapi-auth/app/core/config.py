@@ -1,4 +1,5 @@
 # Central config settings
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -9,10 +10,149 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=60, env="ACCESS_TOKEN_EXPIRE_MINUTES")
     RUN_DB_CREATE_ALL: bool = Field(default=False, env="RUN_DB_CREATE_ALL")
 
+    # Logging (see app/core/log.py)
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = True
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SAMPLE_RATES: str = ""               # e.g. "DEBUG=0.01,INFO=0.25"
+
+    # Latency histograms on /metrics
+    METRICS_ENABLED: bool = True
+
+    # Connection pooling (see app/db/session.py)
+    #   serverless  - NullPool, one connection per session (Vercel)
+    #   persistent  - in-process queue pool for long-running workers
+    #   external    - NullPool behind pgbouncer / Supavisor, no prepared statements
+    DB_POOL_MODE: Literal["serverless", "persistent", "external"] = "serverless"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_USE_LIFO: bool = True
+    DB_CONNECT_TIMEOUT: float = 10.0
+    DB_COMMAND_TIMEOUT: Optional[float] = None
+
+    # Read replicas (comma-separated URLs, same driver/options as DATABASE_URL).
+    # Read-only CRUD methods go to them round-robin; everything else stays on the primary.
+    DATABASE_READ_URLS: str = ""
+    DB_READ_YOUR_WRITES_SECONDS: float = 10.0   # reads of a just-written profile go to the primary
+    DB_READ_YOUR_WRITES_MAX_KEYS: int = 10000
+    DB_REPLICA_FAILURE_THRESHOLD: int = 3       # disconnects before a replica is skipped
+    DB_REPLICA_RESET_TIMEOUT: float = 30.0
+
     SUPABASE_URL: str
     SUPABASE_SERVICE_ROLE_KEY: str
     SUPABASE_ANON_KEY: str
     SUPABASE_JWT_KEY: str
+    SUPABASE_JWT_AUDIENCE: Optional[str] = "authenticated"
+
+    # "supabase": /login checks the password with GoTrue (password grant).
+    # "local": /login verifies profiles.password and signs the access token with
+    # SUPABASE_JWT_KEY, falling back to GoTrue when there is no usable local hash
+    # or it does not match. Local logins return no refresh token and skip GoTrue's
+    # own checks (bans, email confirmation); signups still awaiting confirmation
+    # are stored without a local hash, so they always go through GoTrue. Only
+    # enable this when passwords are never changed outside this service.
+    LOGIN_MODE: Literal["supabase", "local"] = "supabase"
+    LOCAL_TOKEN_EXPIRE_SECONDS: int = 3600
+
+    # How /register gets a session after creating the Supabase user:
+    #   local           - admin create, then sign the access token locally (one upstream call)
+    #   signup          - public /auth/v1/signup, which returns the session itself (one upstream
+    #                     call; with email confirmation on, no tokens until the user confirms)
+    #   password_grant  - admin create, then a password-grant login (two upstream calls)
+    SIGNUP_TOKEN_MODE: Literal["local", "signup", "password_grant"] = "local"
+
+    # bcrypt runs in a worker pool; requests beyond the queue bound get a 503
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16
+
+    # Verified-token cache used by get_current_user (0 disables it)
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+
+    # Read-through cache for CRUDProfile lookups (off by default)
+    PROFILE_CACHE_ENABLED: bool = False
+    PROFILE_CACHE_TTL_SECONDS: float = 30.0
+    PROFILE_CACHE_MAX_SIZE: int = 10000
+
+    # Sessions returned by POST /auth/refresh, replayed for retries of the same
+    # refresh token (keep at or below GoTrue's refresh-token reuse interval)
+    REFRESH_CACHE_TTL_SECONDS: float = 10.0
+    REFRESH_CACHE_MAX_SIZE: int = 10000
+
+    # Shared HTTP client used for all GoTrue calls (see app/services/supabase_auth.py)
+    SUPABASE_HTTP_MAX_CONNECTIONS: int = 100
+    SUPABASE_HTTP_MAX_KEEPALIVE: int = 20
+    SUPABASE_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    SUPABASE_HTTP2: bool = False             # needs the optional `h2` package
+    SUPABASE_CONNECT_TIMEOUT: float = 5.0
+    SUPABASE_POOL_TIMEOUT: float = 5.0
+    SUPABASE_LOGIN_TIMEOUT: float = 10.0
+    SUPABASE_CREATE_USER_TIMEOUT: float = 20.0
+    SUPABASE_REFRESH_TIMEOUT: float = 10.0
+
+    # Resilience for GoTrue calls (see app/services/resilience.py). The *_TIMEOUT
+    # values above cap one attempt; the deadlines cap the whole call, retries included.
+    SUPABASE_LOGIN_DEADLINE: float = 3.0
+    SUPABASE_CREATE_USER_DEADLINE: float = 5.0
+    SUPABASE_REFRESH_DEADLINE: float = 3.0
+    SUPABASE_BREAKER_FAILURE_THRESHOLD: int = 5     # consecutive failures before fast-failing
+    SUPABASE_BREAKER_RESET_SECONDS: float = 10.0    # open time before a probe is let through
+    SUPABASE_RETRY_MAX_ATTEMPTS: int = 3            # idempotent calls only (password grant)
+    SUPABASE_RETRY_BUDGET_RATIO: float = 0.2        # retries+hedges as a fraction of calls
+    SUPABASE_RETRY_MIN_PER_SECOND: float = 1.0
+    SUPABASE_RETRY_BACKOFF_BASE: float = 0.05
+    SUPABASE_RETRY_BACKOFF_MAX: float = 1.0
+    SUPABASE_HEDGE_DELAY_MS: Optional[float] = None  # e.g. 300: hedge password grants slower than this
+
+    # Token-bucket limits for /login, /register and /refresh (see app/core/rate_limit.py)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_IP_PER_MINUTE: float = 60.0
+    RATE_LIMIT_IP_BURST: int = 20
+    RATE_LIMIT_EMAIL_PER_MINUTE: float = 10.0
+    RATE_LIMIT_EMAIL_BURST: int = 5
+    RATE_LIMIT_SHARDS: int = 16
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_BACKEND: Optional[str] = None        # "module:factory" for a shared store
+    # Client address behind a proxy. X-Forwarded-For entries left of the ones our
+    # own proxies appended are whatever the caller sent, so never trust those.
+    RATE_LIMIT_TRUST_FORWARDED: bool = False        # use X-Forwarded-For, RATE_LIMIT_TRUSTED_HOPS from the right
+    RATE_LIMIT_TRUSTED_HOPS: int = 1                # proxies in front of the app that append to X-Forwarded-For
+    RATE_LIMIT_CLIENT_IP_HEADER: Optional[str] = None  # platform-set header instead (e.g. "x-real-ip" on Vercel)
+
+    # Admin-only endpoints expect this value in the X-Admin-Key header (unset disables them)
+    ADMIN_API_KEY: Optional[str] = None
+
+    # POST /profiles/lookup
+    PROFILE_LOOKUP_MAX_IDS: int = 500
+
+    # GET /profiles/search (trigram indexes need at least 3 characters to narrow anything)
+    PROFILE_SEARCH_MIN_LENGTH: int = 3
+    PROFILE_SEARCH_LIMIT: int = 20
+    PROFILE_SEARCH_MAX_LIMIT: int = 100
+
+    # GET /organizations/{org_id}/trainers
+    ORG_TRAINERS_PAGE_SIZE: int = 50
+    ORG_TRAINERS_MAX_PAGE_SIZE: int = 200
+
+    # GET /organizations and /organizations/{org_id} (counters from organization_stats)
+    ORG_LIST_PAGE_SIZE: int = 50
+    ORG_LIST_MAX_PAGE_SIZE: int = 200
+    ORG_SUMMARY_CACHE_TTL_SECONDS: float = 5.0    # 0 disables
+    ORG_SUMMARY_CACHE_MAX_SIZE: int = 10000
+
+    # GET /admin/profiles/export: rows fetched from the server-side cursor per body chunk
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Bulk import (POST /admin/profiles/import, python -m app.services.profile_import)
+    IMPORT_BATCH_SIZE: int = 5000             # rows per COPY + merge transaction
+    IMPORT_MAX_ERRORS: int = 100              # validation errors kept in the report
+    IMPORT_SPOOL_MAX_MEMORY: int = 8 * 1024 * 1024   # upload bytes held in memory before spilling to disk
+
+    # POST /auth/register/batch
+    REGISTER_BATCH_MAX_ITEMS: int = 2000
+    SUPABASE_BATCH_CONCURRENCY: int = 10
 
     class Config:
         env_file = ".env"
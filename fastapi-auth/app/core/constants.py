@@ -10,6 +10,9 @@ MSG_INTERNAL_ERROR = "Internal server error"
 # Registration Successfull Message
 MSG_REGISTERED = "User registered successfully"
 
+# Signed up, but the project requires email confirmation before login
+MSG_CONFIRMATION_REQUIRED = "User registered; confirm your email address to log in"
+
 # User already exists
 MSG_USER__EXISTS = "Email already registered"
 
@@ -18,3 +21,42 @@ MSG_NO_PROFILE = "Profile not found for user"
 
 # Invalid credentials
 MSG_INVALID_CREDENTIALS = "Incorrect email or password"
+
+# Too much concurrent CPU work (password hashing)
+MSG_BUSY = "Server is busy, please retry shortly"
+
+# Batch larger than REGISTER_BATCH_MAX_ITEMS
+MSG_BATCH_TOO_LARGE = "Too many items in batch"
+
+# Same email appears more than once in a batch
+MSG_DUPLICATE_IN_BATCH = "Email appears more than once in batch"
+
+# Upstream (Supabase Auth) failure
+MSG_UPSTREAM_ERROR = "Auth provider request failed"
+
+# Database failure
+MSG_DB_UNAVAILABLE = "Database unavailable"
+
+# Lookup larger than PROFILE_LOOKUP_MAX_IDS
+MSG_LOOKUP_TOO_LARGE = "Too many ids in lookup"
+
+# Refresh token rejected by Supabase Auth
+MSG_INVALID_REFRESH_TOKEN = "Invalid or expired refresh token"
+
+# Supabase Auth down / circuit open
+MSG_UPSTREAM_UNAVAILABLE = "Auth provider unavailable, please retry shortly"
+
+# Too many requests from one IP / for one email
+MSG_RATE_LIMITED = "Too many requests, please retry later"
+
+# Unknown organization id
+MSG_NO_ORGANIZATION = "Organization not found"
+
+# Pagination cursor that we did not issue
+MSG_INVALID_CURSOR = "Invalid pagination cursor"
+
+# Bulk import body that cannot be read as UTF-8 CSV / NDJSON
+MSG_INVALID_IMPORT_FILE = "Import file could not be read"
+
+# Search term shorter than PROFILE_SEARCH_MIN_LENGTH (after trimming)
+MSG_SEARCH_TOO_SHORT = "Search term is too short"
@@ -0,0 +1,135 @@
+# app/core/metrics.py
+"""
+In-process latency histograms rendered in Prometheus text format on /metrics.
+
+Two families are recorded:
+  http_request_duration_seconds{method,route,status}  - by MetricsMiddleware
+  stage_duration_seconds{stage}                       - by span() / timed()
+Recording is a perf_counter pair, a bisect and three increments.
+"""
+import bisect
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+from typing import Callable, Iterable
+
+from app.core.config import settings
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+_requests: dict = {}   # (method, route, status) -> Histogram
+_stages: dict = {}     # stage -> Histogram
+# Callables returning (name, type, help, [(labels_dict, value), ...]) for gauges/counters
+_collectors: list = []
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    key = (method, route, status)
+    hist = _requests.get(key)
+    if hist is None:
+        hist = _requests[key] = Histogram()
+    hist.observe(seconds)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    hist = _stages.get(stage)
+    if hist is None:
+        hist = _stages[stage] = Histogram()
+    hist.observe(seconds)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block as one stage: `with span("jwt_decode"): ...`"""
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, perf_counter() - start)
+
+
+def timed(stage: str) -> Callable:
+    """Decorator for async functions; a no-op when metrics are disabled."""
+    def decorator(fn):
+        if not settings.METRICS_ENABLED:
+            return fn
+
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                observe_stage(stage, perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def register_collector(fn: Callable[[], Iterable[tuple]]) -> None:
+    _collectors.append(fn)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: dict) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs.items()) + "}"
+
+
+def _render_histogram(lines: list, name: str, labels: dict, hist: Histogram) -> None:
+    cumulative = 0
+    for le, n in zip(hist.buckets, hist.counts):
+        cumulative += n
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {cumulative}")
+    cumulative += hist.counts[-1]
+    lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {cumulative}")
+    lines.append(f"{name}_sum{_labels(labels)} {hist.sum}")
+    lines.append(f"{name}_count{_labels(labels)} {hist.count}")
+
+
+def render_prometheus() -> str:
+    lines = [
+        "# HELP http_request_duration_seconds HTTP request latency by route.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (method, route, status), hist in list(_requests.items()):
+        _render_histogram(lines, "http_request_duration_seconds", {"method": method, "route": route, "status": status}, hist)
+
+    lines += [
+        "# HELP stage_duration_seconds Latency of internal stages (upstream calls, DB, JWT, hashing).",
+        "# TYPE stage_duration_seconds histogram",
+    ]
+    for stage, hist in list(_stages.items()):
+        _render_histogram(lines, "stage_duration_seconds", {"stage": stage}, hist)
+
+    for collect in _collectors:
+        for name, kind, help_text, samples in collect():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,137 @@
+# app/core/rate_limit.py
+"""
+Token-bucket rate limiting for the auth endpoints (see `rate_limit` in app/api/deps.py).
+
+Buckets live in a sharded in-memory store by default: one dict lookup and a
+little arithmetic per check, bounded by LRU eviction. Limits then hold per
+process. To share them across instances, point RATE_LIMIT_BACKEND at a
+"module:factory" returning a RateLimitBackend (e.g. one backed by Redis);
+if that backend errors, checks fall back to the in-memory store.
+"""
+import importlib
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitBackend(ABC):
+    """Store interface. `hit` must be atomic per key."""
+
+    @abstractmethod
+    async def hit(self, key: str, rate: float, burst: float) -> float:
+        """
+        Take one token from `key`'s bucket (refilled at `rate`/s, capped at `burst`).
+        Returns 0 when allowed, otherwise the seconds until a token is available.
+        """
+
+
+class InMemoryBackend(RateLimitBackend):
+    def __init__(self, shards: int = 16, max_keys: int = 100_000):
+        # per-shard locks keep checks safe from threadpool callers without
+        # serialising every key behind one lock
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(max(1, shards))]
+        self._per_shard = max(1, max_keys // len(self._shards))
+
+    def take(self, key: str, rate: float, burst: float) -> float:
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            entry = buckets.get(key)
+            if entry is None:
+                tokens = burst
+            else:
+                tokens, updated_at = entry
+                tokens = min(burst, tokens + (now - updated_at) * rate)
+                buckets.move_to_end(key)
+            if tokens >= 1.0:
+                buckets[key] = (tokens - 1.0, now)
+                wait = 0.0
+            else:
+                buckets[key] = (tokens, now)
+                wait = (1.0 - tokens) / rate
+            # idle keys have refilled anyway, so evicting the oldest loses nothing
+            if len(buckets) > self._per_shard:
+                buckets.popitem(last=False)
+        return wait
+
+    async def hit(self, key: str, rate: float, burst: float) -> float:
+        return self.take(key, rate, burst)
+
+    def __len__(self) -> int:
+        return sum(len(buckets) for _, buckets in self._shards)
+
+
+_local = InMemoryBackend(shards=settings.RATE_LIMIT_SHARDS, max_keys=settings.RATE_LIMIT_MAX_KEYS)
+_backend: Optional[RateLimitBackend] = None
+# (scope, kind) -> requests rejected
+rejections: dict = {}
+
+
+def _load_backend(path: str) -> RateLimitBackend:
+    module_name, _, attr = path.partition(":")
+    factory = getattr(importlib.import_module(module_name), attr)
+    return factory()
+
+
+def get_backend() -> RateLimitBackend:
+    global _backend
+    if _backend is None:
+        _backend = _load_backend(settings.RATE_LIMIT_BACKEND) if settings.RATE_LIMIT_BACKEND else _local
+    return _backend
+
+
+def set_backend(backend: Optional[RateLimitBackend]) -> None:
+    """Swap the store at runtime (None goes back to the configured one)."""
+    global _backend
+    _backend = backend
+
+
+async def check(scope: str, kind: str, value: str, per_minute: float, burst: int) -> float:
+    """Count one request against `scope:kind:value`; returns the Retry-After in seconds (0 = allowed)."""
+    key = f"{scope}:{kind}:{value}"
+    rate = per_minute / 60.0
+    backend = get_backend()
+    try:
+        wait = await backend.hit(key, rate, burst)
+    except Exception:
+        if backend is _local:
+            raise
+        logger.warning("Rate limit backend failed; using in-memory buckets", exc_info=True)
+        wait = _local.take(key, rate, burst)
+    if wait:
+        rejections[(scope, kind)] = rejections.get((scope, kind), 0) + 1
+    return wait
+
+
+def client_ip(scope: dict) -> str:
+    """
+    Caller address for per-IP limits. Behind a proxy this is the platform's
+    client-IP header (RATE_LIMIT_CLIENT_IP_HEADER) or the X-Forwarded-For entry
+    appended by the outermost trusted proxy; never the leftmost entry, which
+    the caller controls.
+    """
+    header = settings.RATE_LIMIT_CLIENT_IP_HEADER
+    if header:
+        wanted = header.lower().encode("latin-1")
+        for name, value in scope.get("headers") or ():
+            if name == wanted:
+                address = value.decode("latin-1").split(",", 1)[0].strip()
+                if address:
+                    return address
+    elif settings.RATE_LIMIT_TRUST_FORWARDED:
+        hops = []
+        for name, value in scope.get("headers") or ():
+            if name == b"x-forwarded-for":
+                hops.extend(h.strip() for h in value.decode("latin-1").split(","))
+        trusted = max(1, settings.RATE_LIMIT_TRUSTED_HOPS)
+        if len(hops) >= trusted and hops[-trusted]:
+            return hops[-trusted]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
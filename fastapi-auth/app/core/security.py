@@ -1,25 +1,139 @@
+import asyncio
+import hashlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
-from jose import jwt, JWTError
-from passlib.context import CryptContext
+from typing import Any, Optional
 from app.core.config import settings
+from app.utils.cache import TTLCache
+from app.core.metrics import span, timed
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib and jose are imported on first use to keep them off the cold-start path
+_pwd_context = None
+
+def _get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
+# Decoded claims of already-verified Supabase tokens, keyed by sha256(token).
+# Each entry expires together with the token's own `exp` claim.
+token_cache: TTLCache[dict[str, Any]] = TTLCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
+
+class InvalidTokenError(ValueError):
+    """The token failed signature, audience or expiry checks."""
+    pass
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _get_pwd_context().verify(plain_password, hashed_password)
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when the password-hashing pool already has its maximum backlog."""
+    pass
+
+_hash_executor: Optional[Executor] = None
+_hash_pending = 0
+
+def _get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            # bcrypt releases the GIL, so threads hash in parallel
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="pwhash"
+            )
+    return _hash_executor
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+async def _run_in_hash_pool(fn, *args):
+    # Admission control: fail fast instead of queueing unbounded bcrypt work
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise PasswordHasherBusy("password hashing capacity exhausted")
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), fn, *args)
+    finally:
+        _hash_pending -= 1
+
+@timed("password_hash")
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+@timed("password_verify")
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
 
 def create_access_token(subject: str, expires_minutes: Optional[int] = None) -> str:
     expire_delta = timedelta(minutes=expires_minutes or settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode = {"sub": subject, "exp": datetime.now(timezone.utc) + expire_delta}
+    from jose import jwt
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
+def create_supabase_access_token(user_id: str, *, email: str, expires_in: Optional[int] = None) -> str:
+    """
+    Mint an access token with the claims GoTrue puts in its own, signed with
+    SUPABASE_JWT_KEY, so decode_supabase_token (and Supabase itself) accept it.
+    """
+    from jose import jwt
+    now = int(datetime.now(timezone.utc).timestamp())
+    claims = {
+        "iss": f"{settings.SUPABASE_URL}/auth/v1",
+        "sub": str(user_id),
+        "email": email,
+        "role": "authenticated",
+        "iat": now,
+        "exp": now + (expires_in or settings.LOCAL_TOKEN_EXPIRE_SECONDS),
+    }
+    if settings.SUPABASE_JWT_AUDIENCE:
+        claims["aud"] = settings.SUPABASE_JWT_AUDIENCE
+    return jwt.encode(claims, settings.SUPABASE_JWT_KEY, algorithm="HS256")
+
 def decode_token(token: str) -> Optional[str]:
+    from jose import jwt, JWTError
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload.get("sub")
     except JWTError:
         return None
+
+def decode_supabase_token(token: str) -> dict[str, Any]:
+    """
+    Verify a Supabase access token and return its claims.
+    Repeat tokens are served from `token_cache` without re-running the HMAC check.
+    Raises InvalidTokenError if the token is invalid or expired.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is not None:
+        return claims
+
+    from jose import jwt, JWTError
+    with span("jwt_decode"):
+        try:
+            claims = jwt.decode(
+                token,
+                settings.SUPABASE_JWT_KEY,
+                algorithms=["HS256"],
+                audience=settings.SUPABASE_JWT_AUDIENCE,
+            )
+        except JWTError as e:
+            raise InvalidTokenError(str(e)) from e
+    exp = claims.get("exp")
+    # tokens without an expiry are never cached
+    if isinstance(exp, (int, float)):
+        token_cache.set(key, claims, expires_at=float(exp))
+    return claims
@@ -0,0 +1,267 @@
+# app/crud/organization.py
+import logging
+import uuid
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import timed
+from app.db.session import replica_reads
+from app.models.organization import Organization
+from app.models.organization_stats import OrganizationStats
+from app.models.profile import Profile
+from app.models.trainer import Trainer
+from app.schemas.organization import OrganizationTrainerOut, OrganizationSummaryOut
+from app.utils.cache import TTLCache
+from app.utils.pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+
+def add_to_stats_on_conflict(stmt):
+    """
+    Make an INSERT into organization_stats additive: an existing row gets the
+    inserted counts added to it instead of replaced.
+    """
+    stats = OrganizationStats.__table__
+    return stmt.on_conflict_do_update(
+        index_elements=[stats.c.org_id],
+        set_={
+            "trainer_count": stats.c.trainer_count + stmt.excluded.trainer_count,
+            "years_exp_sum": stats.c.years_exp_sum + stmt.excluded.years_exp_sum,
+            "years_exp_count": stats.c.years_exp_count + stmt.excluded.years_exp_count,
+            "updated_at": func.now(),
+        },
+    )
+
+
+def build_stats_increment(trainer_rows: List[dict]):
+    """
+    One multi-row upsert adding a batch of new trainers (normalized rows with
+    org_id / years_exp) to organization_stats. None if no row has an org.
+    """
+    deltas: dict = {}
+    for row in trainer_rows:
+        if row.get("org_id") is None:
+            continue
+        count, years_sum, years_count = deltas.get(row["org_id"], (0, 0, 0))
+        years = row.get("years_exp")
+        deltas[row["org_id"]] = (count + 1, years_sum + (years or 0), years_count + (years is not None))
+    if not deltas:
+        return None
+    # fixed row order so concurrent batches lock stats rows in the same order
+    values = [
+        {"org_id": org_id, "trainer_count": c, "years_exp_sum": s, "years_exp_count": n}
+        for org_id, (c, s, n) in sorted(deltas.items())
+    ]
+    return add_to_stats_on_conflict(pg_insert(OrganizationStats.__table__).values(values))
+
+
+def _summary_columns():
+    stats = OrganizationStats
+    return (
+        Organization.org_id,
+        Organization.name,
+        Organization.address,
+        func.coalesce(stats.trainer_count, 0).label("trainer_count"),
+        stats.years_exp_sum,
+        stats.years_exp_count,
+        stats.updated_at,
+    )
+
+
+def _summary_from_row(row) -> OrganizationSummaryOut:
+    years_count = row["years_exp_count"] or 0
+    return OrganizationSummaryOut(
+        org_id=row["org_id"],
+        name=row["name"],
+        address=row["address"],
+        trainer_count=row["trainer_count"],
+        avg_years_exp=(round(row["years_exp_sum"] / years_count, 2) if years_count else None),
+        stats_updated_at=row["updated_at"],
+    )
+
+
+class CRUDOrganization:
+    def __init__(self, summary_cache: Optional[TTLCache] = None):
+        # short-TTL cache of summaries and summary pages; reads are O(1) anyway,
+        # this only saves the round trip for dashboards polling the same orgs
+        self.summary_cache = summary_cache
+
+    @timed("crud_org_exists")
+    async def exists(self, db: AsyncSession, org_id: str) -> bool:
+        res = await db.execute(select(Organization.org_id).where(Organization.org_id == org_id))
+        return res.scalar_one_or_none() is not None
+
+    @timed("crud_list_trainers")
+    async def list_trainers(
+        self,
+        db: AsyncSession,
+        org_id: str,
+        *,
+        limit: int,
+        cursor: Optional[str] = None,
+        min_years_exp: Optional[int] = None,
+        max_years_exp: Optional[int] = None,
+        certifications: Optional[List[str]] = None,
+    ) -> Tuple[List[OrganizationTrainerOut], Optional[str]]:
+        """
+        One page of an organization's trainers with their profile fields, ordered by id.
+
+        Keyset pagination: the cursor carries the last id of the previous page, so
+        every page is an index seek on (org_id, id) no matter how deep it is.
+        Raises ValueError for a cursor this method did not produce.
+        """
+        stmt = (
+            select(
+                Trainer.id,
+                Profile.name,
+                Profile.email,
+                Profile.phone,
+                Profile.is_active,
+                Trainer.bio,
+                Trainer.certifications,
+                Trainer.years_exp,
+            )
+            .join(Profile, Profile.id == Trainer.id)
+            .where(Trainer.organization_id == org_id)
+        )
+        if cursor:
+            after = decode_cursor(cursor).get("id")
+            if not isinstance(after, str):
+                raise ValueError("malformed cursor")
+            after = str(uuid.UUID(after))
+            stmt = stmt.where(Trainer.id > after)
+        if min_years_exp is not None:
+            stmt = stmt.where(Trainer.years_exp >= min_years_exp)
+        if max_years_exp is not None:
+            stmt = stmt.where(Trainer.years_exp <= max_years_exp)
+        if certifications:
+            # has all of them; served by the GIN index on trainers.certifications
+            stmt = stmt.where(Trainer.certifications.contains(certifications))
+        # one extra row tells us whether there is a next page
+        stmt = stmt.order_by(Trainer.id).limit(limit + 1)
+
+        try:
+            with replica_reads(db):
+                rows = (await db.execute(stmt)).mappings().all()
+        except Exception:
+            logger.exception("DB error list_trainers", extra={"org_id": org_id})
+            raise
+
+        items = [OrganizationTrainerOut.model_validate(dict(row)) for row in rows[:limit]]
+        next_cursor = encode_cursor({"id": items[-1].id}) if len(rows) > limit else None
+        return items, next_cursor
+
+    @timed("crud_org_summary")
+    async def get_summary(self, db: AsyncSession, org_id: str) -> Optional[OrganizationSummaryOut]:
+        """Organization row plus its stats row, both by primary key."""
+        key = ("org", org_id)
+        if self.summary_cache is not None:
+            cached = self.summary_cache.get(key)
+            if cached is not None:
+                return cached
+        stmt = (
+            select(*_summary_columns())
+            .outerjoin(OrganizationStats, OrganizationStats.org_id == Organization.org_id)
+            .where(Organization.org_id == org_id)
+        )
+        try:
+            with replica_reads(db):
+                row = (await db.execute(stmt)).mappings().one_or_none()
+        except Exception:
+            logger.exception("DB error get_summary", extra={"org_id": org_id})
+            raise
+        if row is None:
+            return None
+        summary = _summary_from_row(row)
+        if self.summary_cache is not None:
+            self.summary_cache.set(key, summary)
+        return summary
+
+    @timed("crud_org_summaries")
+    async def list_summaries(
+        self, db: AsyncSession, *, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[OrganizationSummaryOut], Optional[str]]:
+        """Keyset-paginated summaries ordered by org_id. Raises ValueError for a bad cursor."""
+        key = ("page", cursor, limit)
+        if self.summary_cache is not None:
+            cached = self.summary_cache.get(key)
+            if cached is not None:
+                return cached
+        stmt = select(*_summary_columns()).outerjoin(
+            OrganizationStats, OrganizationStats.org_id == Organization.org_id
+        )
+        if cursor:
+            after = decode_cursor(cursor).get("org_id")
+            if not isinstance(after, str):
+                raise ValueError("malformed cursor")
+            stmt = stmt.where(Organization.org_id > str(uuid.UUID(after)))
+        stmt = stmt.order_by(Organization.org_id).limit(limit + 1)
+        try:
+            with replica_reads(db):
+                rows = (await db.execute(stmt)).mappings().all()
+        except Exception:
+            logger.exception("DB error list_summaries")
+            raise
+        items = [_summary_from_row(row) for row in rows[:limit]]
+        next_cursor = encode_cursor({"org_id": items[-1].org_id}) if len(rows) > limit else None
+        if self.summary_cache is not None:
+            self.summary_cache.set(key, (items, next_cursor))
+        return items, next_cursor
+
+    @timed("crud_org_rebuild_stats")
+    async def rebuild_stats(self, db: AsyncSession, org_id: Optional[str] = None) -> int:
+        """
+        Recompute organization_stats from `trainers` (one org, or all of them) and
+        overwrite the counters. Repairs drift from deletes or out-of-band writes.
+        """
+        stats = OrganizationStats.__table__
+        source = (
+            select(
+                Organization.org_id,
+                func.count(Trainer.id),
+                func.coalesce(func.sum(Trainer.years_exp), 0),
+                func.count(Trainer.years_exp),
+                func.now(),
+            )
+            .outerjoin(Trainer, Trainer.organization_id == Organization.org_id)
+            .group_by(Organization.org_id)
+        )
+        if org_id is not None:
+            source = source.where(Organization.org_id == org_id)
+        stmt = pg_insert(stats).from_select(
+            ["org_id", "trainer_count", "years_exp_sum", "years_exp_count", "updated_at"], source
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[stats.c.org_id],
+            set_={
+                "trainer_count": stmt.excluded.trainer_count,
+                "years_exp_sum": stmt.excluded.years_exp_sum,
+                "years_exp_count": stmt.excluded.years_exp_count,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        try:
+            res = await db.execute(stmt)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            logger.exception("DB error rebuild_stats", extra={"org_id": org_id})
+            raise
+        if self.summary_cache is not None:
+            self.summary_cache.clear()
+        logger.info("Organization stats rebuilt", extra={"org_id": org_id, "rows": res.rowcount})
+        return res.rowcount
+
+
+crud_organization = CRUDOrganization(
+    summary_cache=(
+        TTLCache(max_size=settings.ORG_SUMMARY_CACHE_MAX_SIZE, default_ttl=settings.ORG_SUMMARY_CACHE_TTL_SECONDS)
+        if settings.ORG_SUMMARY_CACHE_TTL_SECONDS > 0
+        else None
+    )
+)
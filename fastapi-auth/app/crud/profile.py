@@ -111,34 +111,270 @@
 # crud_profile = CRUDProfile()
 
 
-from typing import Optional, List
+import asyncio
+from dataclasses import dataclass
+from typing import Optional, List, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert, literal, any_, func, cast, or_
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, insert as pg_insert
+from sqlalchemy import Text, Integer
+from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
 from app.models.profile import Profile
 from app.models.trainer import Trainer
+from app.models.organization_stats import OrganizationStats
 from app.models.client import Client
 from app.models.enums import UserRole
-from app.services.supabase_auth import signup_and_get_tokens
-from app.schemas.profile import Token, AuthData
-import traceback
+from app.core.constants import MSG_USER__EXISTS, MSG_UPSTREAM_ERROR, MSG_UPSTREAM_UNAVAILABLE, MSG_DB_UNAVAILABLE
+from app.services.supabase_auth import signup_and_get_tokens, create_supabase_user, SupabaseUserExistsError
+from app.services.supabase_auth import SupabaseUnavailableError, delete_supabase_user
+from app.schemas.profile import Token, AuthData, ProfileOut, RegisterBatchItemResult
+from app.crud.organization import add_to_stats_on_conflict, build_stats_increment
+from app.db.session import note_write, read_replica_first, replica_reads, used_replica
+from app.utils.cache import TTLCache
+from app.core.metrics import timed
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileAlreadyExistsError(Exception):
+    """A profile with this email (or id) already exists."""
+    pass
+
+
+def _is_unique_violation(e: IntegrityError) -> bool:
+    return getattr(e.orig, "sqlstate", None) == "23505"
+
+
+async def discard_auth_users(user_ids: List[str]) -> None:
+    """
+    Delete Auth users whose profile row was never written, so the email can
+    register again. Failures are logged with the user id and not raised.
+    """
+    sem = asyncio.Semaphore(settings.SUPABASE_BATCH_CONCURRENCY)
+
+    async def discard(user_id: str) -> None:
+        async with sem:
+            try:
+                await delete_supabase_user(user_id)
+            except Exception:
+                logger.exception("Orphaned Supabase user not deleted", extra={"user_id": user_id})
+
+    await asyncio.gather(*(discard(user_id) for user_id in user_ids))
+
+def _escape_like(value: str) -> str:
+    """Make user input literal inside a LIKE pattern (escape character: backslash)."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def normalize_trainer_fields(trainer_fields: Optional[dict], *, email: Optional[str] = None) -> dict:
+    """Trainer column values from the register payload (certifications -> TEXT[], years_exp -> int)."""
+    fields = trainer_fields or {}
+    certs_in = fields.get("certifications")
+    if isinstance(certs_in, str):
+        certs: Optional[List[str]] = [c.strip() for c in certs_in.split(",") if c.strip()]
+    else:
+        certs = certs_in
+
+    years_raw = fields.get("years_exp")
+    try:
+        years = int(years_raw) if years_raw is not None else 0
+    except (TypeError, ValueError):
+        logger.warning("Invalid years_exp; defaulting to 0", extra={"years_exp": years_raw, "email": email})
+        years = 0
+
+    return {
+        "bio": fields.get("bio"),
+        "certifications": certs,
+        "years_exp": years,
+        "org_id": fields.get("organization_id"),
+    }
+
+
+def normalize_client_fields(client_fields: Optional[dict]) -> dict:
+    return {"fitness_goal": (client_fields or {}).get("fitness_goal")}
+
+
+def build_profile_insert(
+    *,
+    id: str,
+    name: Optional[str],
+    email: str,
+    hashed_password: Optional[str],
+    phone: Optional[str],
+    user_type: Optional[UserRole],
+    trainer_row: Optional[dict] = None,
+    client_row: Optional[dict] = None,
+):
+    """
+    One INSERT ... RETURNING statement for the profile plus an optional
+    trainer/client row, chained through data-modifying CTEs.
+    """
+    profiles = Profile.__table__
+    new_profile = (
+        insert(profiles)
+        .values(
+            id=id,
+            full_name=name,
+            email=email,
+            password=hashed_password,
+            phone=phone,
+            role=user_type,
+            onboarded=False,
+        )
+        .returning(profiles.c.id, profiles.c.full_name, profiles.c.email, profiles.c.phone, profiles.c.role, profiles.c.onboarded)
+        .cte("new_profile")
+    )
+    stmt = select(new_profile)
+
+    if trainer_row is not None:
+        trainers = Trainer.__table__
+        new_role = insert(trainers).from_select(
+            ["id", "bio", "certifications", "years_exp", "org_id"],
+            select(
+                new_profile.c.id,
+                literal(trainer_row["bio"], Text),
+                literal(trainer_row["certifications"], ARRAY(Text)),
+                literal(trainer_row["years_exp"], Integer),
+                literal(trainer_row["org_id"], UUID(as_uuid=False)),
+            ),
+        ).returning(trainers.c.org_id, trainers.c.years_exp)
+        new_trainer = new_role.cte("new_trainer")
+        # keep the organization's headcount/experience counters in the same statement
+        new_stats = add_to_stats_on_conflict(
+            pg_insert(OrganizationStats.__table__).from_select(
+                ["org_id", "trainer_count", "years_exp_sum", "years_exp_count"],
+                select(
+                    new_trainer.c.org_id,
+                    literal(1, Integer),
+                    func.coalesce(new_trainer.c.years_exp, 0),
+                    cast(new_trainer.c.years_exp.isnot(None), Integer),
+                ).where(new_trainer.c.org_id.isnot(None)),
+            )
+        )
+        stmt = stmt.add_cte(new_trainer).add_cte(new_stats.cte("new_org_stats"))
+    elif client_row is not None:
+        clients = Client.__table__
+        new_role = insert(clients).from_select(
+            ["id", "fitness_goal"],
+            select(new_profile.c.id, literal(client_row["fitness_goal"], Text)),
+        )
+        stmt = stmt.add_cte(new_role.cte("new_client"))
+
+    return stmt
+
+
+def profile_out_from_row(row) -> ProfileOut:
+    # row uses DB column names (full_name, role, onboarded)
+    return ProfileOut(
+        id=row["id"],
+        name=row["full_name"],
+        email=row["email"],
+        phone=row["phone"],
+        user_type=row["role"],
+        is_active=row["onboarded"],
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class ProfileSnapshot:
+    """Detached, read-only copy of a Profile row; safe to share across sessions."""
+    id: str
+    name: Optional[str]
+    email: str
+    password: Optional[str]
+    phone: Optional[str]
+    user_type: Optional[UserRole]
+    is_active: bool
+
+    @classmethod
+    def from_orm(cls, profile: Profile) -> "ProfileSnapshot":
+        return cls(
+            id=profile.id,
+            name=profile.name,
+            email=profile.email,
+            password=profile.password,
+            phone=profile.phone,
+            user_type=profile.user_type,
+            is_active=profile.is_active,
+        )
+
+
+def profile_load_options(include: frozenset) -> list:
+    """Eager-load strategies for the relationships named in `include` (all to-one, so joined)."""
+    options = []
+    if "organization" in include:
+        options.append(joinedload(Profile.trainer).joinedload(Trainer.organization))
+    elif "trainer" in include:
+        options.append(joinedload(Profile.trainer))
+    if "client" in include:
+        options.append(joinedload(Profile.client))
+    return options
+
 
 class CRUDProfile:
-    async def get_by_email(self, db: AsyncSession, email: str) -> Optional[Profile]:
-        try:
+    def __init__(self, cache: Optional[TTLCache[ProfileSnapshot]] = None):
+        # When set, get_by_id / get_by_email return cached ProfileSnapshot objects
+        self.cache = cache
+
+    def _remember(self, profile: Optional[Profile]) -> Optional[ProfileSnapshot]:
+        if profile is None:
+            return None
+        snap = ProfileSnapshot.from_orm(profile)
+        self.cache.set(("id", snap.id), snap)
+        self.cache.set(("email", snap.email), snap)
+        return snap
+
+    def invalidate(self, *, id: Optional[str] = None, email: Optional[str] = None) -> None:
+        if self.cache is None:
+            return
+        if id is not None:
+            self.cache.pop(("id", id))
+        if email is not None:
+            self.cache.pop(("email", email))
+
+    @timed("crud_get_by_email")
+    async def get_by_email(
+        self, db: AsyncSession, email: str, *, retry_miss: bool = True
+    ) -> Optional[Union[Profile, ProfileSnapshot]]:
+        """retry_miss=False skips re-checking the primary when a replica has no such email."""
+        if self.cache is not None:
+            cached = self.cache.get(("email", email))
+            if cached is not None:
+                return cached
+        async def query() -> Optional[Profile]:
             res = await db.execute(select(Profile).where(Profile.email == email))
             return res.scalar_one_or_none()
-        except Exception as e:
-            print(f"DB error get_by_email email={email}: {e}\n{traceback.format_exc()}", flush=True)
+
+        try:
+            profile = await read_replica_first(db, query, ("email", email), retry_miss=retry_miss)
+        except Exception:
+            logger.exception("DB error get_by_email", extra={"email": email})
             raise
+        return self._remember(profile) if self.cache is not None else profile
 
-    async def get_by_id(self, db: AsyncSession, id: str) -> Optional[Profile]:
+    @timed("crud_get_by_id")
+    async def get_by_id(
+        self, db: AsyncSession, id: str, include: frozenset = frozenset()
+    ) -> Optional[Union[Profile, ProfileSnapshot]]:
+        # Snapshots carry no relationships, so include= reads bypass the cache
+        use_cache = self.cache is not None and not include
+        if use_cache:
+            cached = self.cache.get(("id", id))
+            if cached is not None:
+                return cached
         try:
-            return await db.get(Profile, id)
-        except Exception as e:
-            print(f"DB error get_by_id id={id}: {e}\n{traceback.format_exc()}", flush=True)
+            profile = await read_replica_first(
+                db, lambda: db.get(Profile, id, options=profile_load_options(include)), ("id", id)
+            )
+        except Exception:
+            logger.exception("DB error get_by_id", extra={"profile_id": id})
             raise
+        return self._remember(profile) if use_cache else profile
 
+    @timed("crud_create_profile_with_role")
     async def create_profile_with_role(
         self,
         db: AsyncSession,
@@ -161,95 +397,242 @@ class CRUDProfile:
                 phone=phone,
                 role=(user_type.value if user_type else None),
             )
-            print(f"Supabase signup OK email={email} user_id={sess.user_id}", flush=True)
-        except Exception as e:
-            print(f"Supabase signup FAILED email={email}: {e}\n{traceback.format_exc()}", flush=True)
+            logger.info("Supabase signup OK", extra={"email": email, "user_id": sess.user_id})
+        except Exception:
+            logger.exception("Supabase signup FAILED", extra={"email": email})
             raise
 
-        # 2) Insert into profiles using the SAME id
-        profile = Profile(
+        # 2) Insert the profile and its role row in a single statement:
+        #    WITH new_profile AS (INSERT ... RETURNING *), new_role AS (INSERT ... SELECT FROM new_profile)
+        #    Duplicate emails surface as a unique violation instead of a pre-check SELECT.
+        #    No session means GoTrue still wants the email confirmed: store no local hash,
+        #    so LOGIN_MODE=local leaves that user's logins to GoTrue, which enforces it.
+        stmt = build_profile_insert(
             id=sess.user_id,
             name=name,
             email=email,
-            password=hashed_password,
+            hashed_password=(hashed_password if sess.access_token else None),
             phone=phone,
             user_type=user_type,
-            is_active=False,
+            trainer_row=(normalize_trainer_fields(trainer_fields, email=email) if user_type == UserRole.trainer else None),
+            client_row=(normalize_client_fields(client_fields) if user_type == UserRole.client else None),
         )
         try:
-            db.add(profile)
-            await db.flush()
-            print(f"DB flush OK profile_id={profile.id}", flush=True)
-        except Exception as e:
-            print(f"DB flush FAILED email={email}: {e}\n{traceback.format_exc()}", flush=True)
-            raise
-
-        # 3) Optional role rows
-        try:
-            if user_type == UserRole.trainer:
-                certs_in = (trainer_fields or {}).get("certifications")
-                if isinstance(certs_in, str):
-                    certs: Optional[List[str]] = [c.strip() for c in certs_in.split(",") if c.strip()]
-                else:
-                    certs = certs_in
-
-                years_raw = (trainer_fields or {}).get("years_exp")
-                try:
-                    years = int(years_raw) if years_raw is not None else 0
-                except (TypeError, ValueError):
-                    print(f"Invalid years_exp={years_raw} for email={email}; defaulting to 0", flush=True)
-                    years = 0
-
-                trainer = Trainer(
-                    id=profile.id,
-                    bio=(trainer_fields or {}).get("bio"),
-                    certifications=certs,
-                    years_exp=years,
-                    organization_id=(trainer_fields or {}).get("organization_id"),
-                )
-                db.add(trainer)
-                print(f"Prepared Trainer row for profile_id={profile.id}", flush=True)
-
-            elif user_type == UserRole.client:
-                client = Client(
-                    id=profile.id,
-                    fitness_goal=(client_fields or {}).get("fitness_goal"),
-                )
-                db.add(client)
-                print(f"Prepared Client row for profile_id={profile.id}", flush=True)
-
-        except Exception as e:
-            print(f"Role row build/add FAILED profile_id={profile.id}: {e}\n{traceback.format_exc()}", flush=True)
-            raise
-
-        # 4) Commit
-        try:
+            row = (await db.execute(stmt)).mappings().one()
             await db.commit()
-            print(f"DB commit OK profile_id={profile.id}", flush=True)
+            logger.debug("DB insert+commit OK", extra={"profile_id": sess.user_id})
+            self.invalidate(id=sess.user_id, email=email)
+            note_write(("id", sess.user_id), ("email", email))
         except IntegrityError as e:
             await db.rollback()
-            print(f"DB commit IntegrityError profile_id={profile.id}: {e}\n{traceback.format_exc()}", flush=True)
+            logger.warning("DB insert IntegrityError", extra={"email": email}, exc_info=True)
+            await discard_auth_users([sess.user_id])
+            if _is_unique_violation(e):
+                raise ProfileAlreadyExistsError(email) from e
             raise
-        except Exception as e:
+        except Exception:
             await db.rollback()
-            print(f"DB commit FAILED profile_id={profile.id}: {e}\n{traceback.format_exc()}", flush=True)
-            raise
-
-        # 5) Refresh
-        try:
-            await db.refresh(profile)
-            print(f"DB refresh OK profile_id={profile.id}", flush=True)
-        except Exception as e:
-            print(f"DB refresh FAILED profile_id={profile.id}: {e}\n{traceback.format_exc()}", flush=True)
+            logger.exception("DB insert FAILED", extra={"email": email})
+            await discard_auth_users([sess.user_id])
             raise
 
         token_payload = Token(
             access_token=sess.access_token,
             token_type="bearer",
             refresh_token=sess.refresh_token
-        )
-        data = AuthData(token=token_payload, profile=profile)
-        print(f"Register OK user_id={sess.user_id} role={user_type}", flush=True)
+        ) if sess.access_token else None
+        data = AuthData(token=token_payload, profile=profile_out_from_row(row))
+        logger.info("Register OK", extra={"user_id": sess.user_id, "role": (user_type.value if user_type else None)})
         return data
 
-crud_profile = CRUDProfile()
+    @timed("crud_get_many_by_ids")
+    async def get_many_by_ids(
+        self, db: AsyncSession, ids: List[str], include: frozenset = frozenset()
+    ) -> List[Optional[Union[Profile, ProfileSnapshot]]]:
+        """Fetch many profiles with one `id = ANY(:ids)` query; result is aligned with `ids` (None if missing)."""
+        use_cache = self.cache is not None and not include
+        found: dict = {}
+        to_fetch = []
+        for id in dict.fromkeys(ids):
+            cached = self.cache.get(("id", id)) if use_cache else None
+            if cached is not None:
+                found[id] = cached
+            else:
+                to_fetch.append(id)
+
+        async def fetch(fetch_ids: List[str]) -> None:
+            res = await db.execute(
+                select(Profile)
+                .where(Profile.id == any_(literal(fetch_ids, ARRAY(UUID(as_uuid=False)))))
+                .options(*profile_load_options(include))
+            )
+            for profile in res.scalars().all():
+                found[profile.id] = self._remember(profile) if use_cache else profile
+
+        if to_fetch:
+            try:
+                with replica_reads(db, *(("id", id) for id in to_fetch)):
+                    await fetch(to_fetch)
+                # ids a replica did not have yet are looked up on the primary
+                missing = [id for id in to_fetch if id not in found]
+                if missing and used_replica(db):
+                    await fetch(missing)
+            except Exception:
+                logger.exception("DB error get_many_by_ids", extra={"count": len(to_fetch)})
+                raise
+
+        return [found.get(id) for id in ids]
+
+    @timed("crud_search")
+    async def search(self, db: AsyncSession, q: str, *, limit: int) -> List[ProfileOut]:
+        """
+        Profiles whose name, email or phone contains `q` (case-insensitive),
+        served by the pg_trgm GIN indexes. Prefix matches rank first, then
+        trigram similarity to `q`.
+        """
+        profiles = Profile.__table__
+        columns = (profiles.c.full_name, profiles.c.email, profiles.c.phone)
+        needle = _escape_like(q)
+        contains = or_(*(c.ilike(f"%{needle}%", escape="\\") for c in columns))
+        prefix = or_(*(c.ilike(f"{needle}%", escape="\\") for c in columns))
+        score = func.greatest(*(func.similarity(c, q) for c in columns))
+        stmt = (
+            select(profiles.c.id, *columns, profiles.c.role, profiles.c.onboarded)
+            .where(contains)
+            .order_by(prefix.desc(), score.desc(), profiles.c.id)
+            .limit(limit)
+        )
+        try:
+            with replica_reads(db):
+                rows = (await db.execute(stmt)).mappings().all()
+        except Exception:
+            logger.exception("DB error search", extra={"q_length": len(q)})
+            raise
+        return [profile_out_from_row(row) for row in rows]
+
+    @timed("crud_get_existing_emails")
+    async def get_existing_emails(self, db: AsyncSession, emails: List[str]) -> set:
+        if not emails:
+            return set()
+        try:
+            res = await db.execute(
+                select(Profile.email).where(Profile.email == any_(literal(emails, ARRAY(Text))))
+            )
+            return set(res.scalars().all())
+        except Exception:
+            logger.exception("DB error get_existing_emails", extra={"count": len(emails)})
+            raise
+
+    @timed("crud_create_many_with_role")
+    async def create_many_with_role(self, db: AsyncSession, entries: List[dict]) -> List[RegisterBatchItemResult]:
+        """
+        Batch variant of create_profile_with_role. Each entry holds the same keys
+        as its keyword arguments plus `index`. Auth users are created with bounded
+        concurrency, then every profile/trainer/client row is written with
+        multi-row inserts in one transaction. Failures are reported per item.
+        """
+        results: dict = {}
+
+        def failed(entry: dict, message: str) -> RegisterBatchItemResult:
+            return RegisterBatchItemResult(index=entry["index"], email=entry["email"], success=False, message=message)
+
+        # 1) Skip emails that already have a profile (one query for the batch)
+        existing = await self.get_existing_emails(db, [e["email"] for e in entries])
+        pending = []
+        for entry in entries:
+            if entry["email"] in existing:
+                results[entry["index"]] = failed(entry, MSG_USER__EXISTS)
+            else:
+                pending.append(entry)
+
+        # 2) Create in Supabase Auth, at most SUPABASE_BATCH_CONCURRENCY calls in flight
+        sem = asyncio.Semaphore(settings.SUPABASE_BATCH_CONCURRENCY)
+
+        async def create_auth_user(entry: dict) -> str:
+            async with sem:
+                return await create_supabase_user(
+                    email=entry["email"],
+                    password=entry["plain_password"],
+                    full_name=entry["name"],
+                    phone=entry["phone"],
+                    role=(entry["user_type"].value if entry["user_type"] else None),
+                )
+
+        outcomes = await asyncio.gather(*(create_auth_user(e) for e in pending), return_exceptions=True)
+        created = []
+        for entry, outcome in zip(pending, outcomes):
+            if isinstance(outcome, SupabaseUserExistsError):
+                results[entry["index"]] = failed(entry, MSG_USER__EXISTS)
+            elif isinstance(outcome, SupabaseUnavailableError):
+                results[entry["index"]] = failed(entry, MSG_UPSTREAM_UNAVAILABLE)
+            elif isinstance(outcome, BaseException):
+                logger.warning("Supabase signup FAILED", extra={"email": entry["email"], "error": str(outcome)})
+                results[entry["index"]] = failed(entry, MSG_UPSTREAM_ERROR)
+            else:
+                created.append((entry, outcome))
+
+        # 3) Bulk insert profiles + role rows in one transaction
+        if created:
+            profile_rows, trainer_rows, client_rows = [], [], []
+            for entry, user_id in created:
+                profile_rows.append({
+                    "id": user_id,
+                    "full_name": entry["name"],
+                    "email": entry["email"],
+                    "password": entry["hashed_password"],
+                    "phone": entry["phone"],
+                    "role": entry["user_type"],
+                    "onboarded": False,
+                })
+                if entry["user_type"] == UserRole.trainer:
+                    trainer_rows.append({"id": user_id, **normalize_trainer_fields(entry.get("trainer_fields"), email=entry["email"])})
+                elif entry["user_type"] == UserRole.client:
+                    client_rows.append({"id": user_id, **normalize_client_fields(entry.get("client_fields"))})
+
+            profiles = Profile.__table__
+            try:
+                res = await db.execute(
+                    pg_insert(profiles).on_conflict_do_nothing().returning(profiles.c.id),
+                    profile_rows,
+                )
+                inserted = set(res.scalars().all())
+                trainer_rows = [r for r in trainer_rows if r["id"] in inserted]
+                client_rows = [r for r in client_rows if r["id"] in inserted]
+                if trainer_rows:
+                    await db.execute(insert(Trainer.__table__), trainer_rows)
+                    stats_stmt = build_stats_increment(trainer_rows)
+                    if stats_stmt is not None:
+                        await db.execute(stats_stmt)
+                if client_rows:
+                    await db.execute(insert(Client.__table__), client_rows)
+                await db.commit()
+                logger.info("DB batch insert OK", extra={"profiles": len(inserted)})
+            except Exception:
+                await db.rollback()
+                logger.exception("DB batch insert FAILED", extra={"count": len(profile_rows)})
+                inserted = set()
+                for entry, _ in created:
+                    results[entry["index"]] = failed(entry, MSG_DB_UNAVAILABLE)
+            else:
+                for entry, user_id in created:
+                    if user_id in inserted:
+                        self.invalidate(id=user_id, email=entry["email"])
+                        note_write(("id", user_id), ("email", entry["email"]))
+                        results[entry["index"]] = RegisterBatchItemResult(
+                            index=entry["index"], email=entry["email"], success=True, id=user_id
+                        )
+                    else:
+                        # lost a race with a concurrent registration
+                        results[entry["index"]] = failed(entry, MSG_USER__EXISTS)
+            # auth users without a profile would block these emails from registering again
+            await discard_auth_users([user_id for _, user_id in created if user_id not in inserted])
+
+        return [results[e["index"]] for e in entries]
+
+crud_profile = CRUDProfile(
+    cache=(
+        TTLCache(max_size=settings.PROFILE_CACHE_MAX_SIZE, default_ttl=settings.PROFILE_CACHE_TTL_SECONDS)
+        if settings.PROFILE_CACHE_ENABLED
+        else None
+    )
+)
@@ -10,37 +10,334 @@
 
 
 # app/db/session.py
-import ssl, certifi
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy.pool import NullPool
+import ssl
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Hashable, Iterator, List, Optional, TypeVar
+from uuid import uuid4
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import observe_stage
+from app.services.resilience import CircuitBreaker, CircuitOpenError
+from app.utils.cache import TTLCache
 
-# ssl_ctx = ssl.create_default_context(cafile=certifi.where())
-ssl_ctx = ssl.create_default_context()
-ssl_ctx.check_hostname = False
-ssl_ctx.verify_mode = ssl.CERT_NONE
-
-# Serverless-friendly engine: no long-lived pools, TLS on asyncpg, pre-ping
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    poolclass=NullPool,        # do not hold connections between invocations
-    pool_pre_ping=True,        # validate before use
-    connect_args={"ssl": ssl_ctx, "statement_cache_size": 0},# asyncpg TLS
-    echo=False,
-    future=True,
-)
+# The SSL context, engine and sessionmaker are built on first use rather than
+# at import, so a cold start (Vercel imports app.server per instance) does not
+# pay for them, or for importing the asyncpg dialect, before serving a request.
+_ssl_ctx: Optional[ssl.SSLContext] = None
+_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[async_sessionmaker] = None
+_replicas: Optional[List["Replica"]] = None
+
+T = TypeVar("T")
+
+def get_ssl_context() -> ssl.SSLContext:
+    global _ssl_ctx
+    if _ssl_ctx is None:
+        # ssl_ctx = ssl.create_default_context(cafile=certifi.where())
+        ctx = ssl.create_default_context()
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+        _ssl_ctx = ctx
+    return _ssl_ctx
+
+
+class PoolStats:
+    """Process-wide checkout counters for the engine's pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+            "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+        }
+
+pool_stats = PoolStats()
+
+
+class _TimedPoolMixin:
+    # Time spent getting a raw connection: queue wait for pooled modes,
+    # the full connect + TLS handshake for NullPool (stage "db_checkout").
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            observe_stage("db_checkout", waited)
+            pool_stats.checkouts += 1
+            pool_stats.wait_seconds_total += waited
+            if waited > pool_stats.wait_seconds_max:
+                pool_stats.wait_seconds_max = waited
+
+    def _do_return_conn(self, record):
+        pool_stats.checkins += 1
+        return super()._do_return_conn(record)
+
+class TimedNullPool(_TimedPoolMixin, NullPool):
+    pass
+
+class TimedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _engine_options(database_url: str) -> tuple[str, dict]:
+    url = make_url(database_url)
+    connect_args = {"ssl": get_ssl_context(), "timeout": settings.DB_CONNECT_TIMEOUT}  # asyncpg TLS
+    if settings.DB_COMMAND_TIMEOUT is not None:
+        connect_args["command_timeout"] = settings.DB_COMMAND_TIMEOUT
+    mode = settings.DB_POOL_MODE
+
+    if mode == "persistent":
+        # Long-running workers: keep warm connections, validate them before use
+        # and recycle them before server/proxy idle timeouts kick in.
+        return url, dict(
+            poolclass=TimedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_use_lifo=settings.DB_POOL_USE_LIFO,
+            pool_pre_ping=True,
+            connect_args=connect_args,
+        )
+
+    if mode == "external":
+        # pgbouncer / Supavisor in transaction mode: the pooler owns the
+        # connections, so no prepared statements may outlive a transaction.
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+        return url, dict(poolclass=TimedNullPool, pool_pre_ping=False, connect_args=connect_args)
+
+    # serverless: do not hold connections between invocations. Every checkout
+    # is a fresh connection, so pre-ping would only add a round trip.
+    connect_args["statement_cache_size"] = 0
+    return url, dict(poolclass=TimedNullPool, pool_pre_ping=False, connect_args=connect_args)
+
+
+def _count_connect(dbapi_connection, connection_record):
+    pool_stats.connects += 1
+
+def _create_engine(database_url: str) -> AsyncEngine:
+    url, options = _engine_options(database_url)
+    engine = create_async_engine(url, echo=False, future=True, **options)
+    event.listen(engine.sync_engine, "connect", _count_connect)
+    return engine
 
-AsyncSessionLocal = async_sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False,
-    autocommit=False,
+def get_engine() -> AsyncEngine:
+    global _engine
+    if _engine is None:
+        _engine = _create_engine(settings.DATABASE_URL)
+    return _engine
+
+
+# --- Read replicas -----------------------------------------------------------
+# Read-only CRUD methods wrap their queries in `replica_reads(db, ...)`; the
+# session then binds those queries to a replica (round-robin, one replica per
+# session). Everything else, including any query of a session that has
+# already used the primary, goes to the primary. Profiles written by this
+# process are read from the primary for DB_READ_YOUR_WRITES_SECONDS.
+
+class Replica:
+    def __init__(self, index: int, database_url: str):
+        self.engine = _create_engine(database_url)
+        # a replica that keeps dropping connections is skipped until a probe succeeds
+        self.breaker = CircuitBreaker(
+            f"db_replica_{index}", settings.DB_REPLICA_FAILURE_THRESHOLD, settings.DB_REPLICA_RESET_TIMEOUT
+        )
+        self.reads = 0
+        event.listen(self.engine.sync_engine, "do_connect", self._do_connect)
+        event.listen(self.engine.sync_engine, "handle_error", self._on_error)
+
+    def _do_connect(self, dialect, connection_record, cargs, cparams):
+        # refused / timed-out connects are raised before handle_error would see them
+        try:
+            dbapi_connection = dialect.connect(*cargs, **cparams)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return dbapi_connection
+
+    def _on_error(self, context):
+        # connect failures are already counted in _do_connect
+        if context.is_disconnect and context.connection is not None:
+            self.breaker.record_failure()
+
+def get_replicas() -> List[Replica]:
+    global _replicas
+    if _replicas is None:
+        urls = [u.strip() for u in settings.DATABASE_READ_URLS.split(",") if u.strip()]
+        _replicas = [Replica(i, url) for i, url in enumerate(urls)]
+    return _replicas
+
+_next_replica = 0
+# reads routed to a replica / sent to the primary by the read-your-writes guard,
+# a missing (all breakers open) replica, or a failed replica query
+routing_stats = {"replica": 0, "primary_recent_write": 0, "primary_no_replica": 0, "primary_replica_error": 0}
+
+def _pick_replica() -> Optional[Replica]:
+    global _next_replica
+    replicas = get_replicas()
+    for _ in range(len(replicas)):
+        replica = replicas[_next_replica % len(replicas)]
+        _next_replica += 1
+        try:
+            replica.breaker.before_call()
+        except CircuitOpenError:
+            continue
+        return replica
+    return None
+
+recent_writes: TTLCache = TTLCache(
+    max_size=settings.DB_READ_YOUR_WRITES_MAX_KEYS, default_ttl=settings.DB_READ_YOUR_WRITES_SECONDS
 )
 
+def note_write(*keys: Hashable) -> None:
+    """Record that rows identified by `keys` (e.g. ("id", id), ("email", email)) were just written."""
+    if settings.DATABASE_READ_URLS:
+        for key in keys:
+            recent_writes.set(key, True)
+
+@contextmanager
+def replica_reads(db: AsyncSession, *keys: Hashable) -> Iterator[None]:
+    """
+    Let the queries issued inside this block go to a read replica, unless
+    one of `keys` was written recently (see note_write). No-op without replicas.
+    """
+    if not settings.DATABASE_READ_URLS:
+        yield
+        return
+    if any(recent_writes.get(key) for key in keys):
+        routing_stats["primary_recent_write"] += 1
+        yield
+        return
+    info = db.sync_session.info
+    previous = info.get("replica_reads", False)
+    info["replica_reads"] = True
+    try:
+        yield
+    finally:
+        info["replica_reads"] = previous
+
+def used_replica(db: AsyncSession) -> bool:
+    """Whether this session has read from a replica (callers can retry a miss on the primary)."""
+    return "replica" in db.sync_session.info
+
+async def read_replica_first(
+    db: AsyncSession, query: Callable[[], Awaitable[T]], *keys: Hashable, retry_miss: bool = True
+) -> Optional[T]:
+    """
+    Run `query()` inside replica_reads; if it found nothing on a replica, run
+    it again on the primary (the row may not have replicated yet, e.g. a user
+    who registered through another instance a moment ago). A query that fails
+    on a replica is retried on the primary as well. Callers for whom a miss is
+    the common, harmless answer (existence checks backed by a unique
+    constraint or another fallback) pass retry_miss=False.
+    """
+    info = db.sync_session.info
+    try:
+        with replica_reads(db, *keys):
+            result = await query()
+    except Exception:
+        if "replica" not in info or info.get("primary"):
+            raise
+        # the session has only read from the replica, so nothing is lost by rolling back
+        await db.rollback()
+        info.pop("replica")
+        info["primary"] = True
+        routing_stats["primary_replica_error"] += 1
+        return await query()
+    if result is None and retry_miss and used_replica(db):
+        result = await query()
+    return result
+
+class RoutingSession(Session):
+    """Session whose reads inside `replica_reads` blocks are bound to a replica."""
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        info = self.info
+        if info.get("replica_reads") and not self._flushing and not info.get("primary"):
+            replica = info.get("replica") or _pick_replica()
+            if replica is not None:
+                info["replica"] = replica
+                replica.reads += 1
+                routing_stats["replica"] += 1
+                return replica.engine.sync_engine
+            routing_stats["primary_no_replica"] += 1
+        else:
+            # once the primary is in the transaction, later reads stay there
+            info["primary"] = True
+        return super().get_bind(mapper, clause=clause, **kw)
+
+def get_replica_stats() -> list:
+    if _replicas is None:
+        return []
+    return [
+        {"name": r.breaker.name, "state": r.breaker.state, "reads": r.reads, "opens": r.breaker.opens}
+        for r in _replicas
+    ]
+
+
+def get_sessionmaker() -> async_sessionmaker:
+    global _sessionmaker
+    if _sessionmaker is None:
+        _sessionmaker = async_sessionmaker(
+            bind=get_engine(),
+            class_=AsyncSession,
+            sync_session_class=RoutingSession,
+            expire_on_commit=False,
+            autoflush=False,
+            autocommit=False,
+        )
+    return _sessionmaker
+
+def __getattr__(name: str):
+    # `from app.db.session import engine, AsyncSessionLocal` keeps working
+    if name == "engine":
+        return get_engine()
+    if name == "AsyncSessionLocal":
+        return get_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_pool_stats() -> dict:
+    if _engine is None:
+        # do not create the engine just to report on it
+        return {"mode": settings.DB_POOL_MODE, "status": "not initialized", **pool_stats.as_dict()}
+    pool = _engine.sync_engine.pool
+    stats = {"mode": settings.DB_POOL_MODE, "status": pool.status(), **pool_stats.as_dict()}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    return stats
+
 # Use this as your FastAPI dependency
 async def get_db() -> AsyncSession:
-    async with AsyncSessionLocal() as session:
+    async with get_sessionmaker()() as session:
         yield session
 
-get_session = get_db
\ No newline at end of file
+get_session = get_db
@@ -0,0 +1,34 @@
+# app/models/organization_stats.py
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID, TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import text
+
+from app.db.base import Base
+
+
+class OrganizationStats(Base):
+    """
+    Per-organization trainer aggregates, maintained incrementally on trainer
+    inserts (see app/crud/organization.py) and rebuildable from `trainers`.
+    """
+    __tablename__ = "organization_stats"
+
+    org_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False),
+        ForeignKey("organizations.org_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    trainer_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    # avg years_exp = years_exp_sum / years_exp_count (trainers with a value only)
+    years_exp_sum: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text("0"))
+    years_exp_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=text("now()")
+    )
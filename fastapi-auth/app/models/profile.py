@@ -2,12 +2,19 @@ from uuid import uuid4
 from typing import Optional
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID, ENUM as PGEnum
-from sqlalchemy import Text, Boolean, text
+from sqlalchemy import Text, Boolean, text, DDL, Index, event
 from app.db.base import Base
 from app.models.enums import UserRole
 
 class Profile(Base):
     __tablename__ = "profiles"
+    __table_args__ = (
+        # substring / fuzzy search (ILIKE '%q%', similarity) on name, email and phone;
+        # gin_trgm_ops needs the pg_trgm extension, created below
+        Index("ix_profiles_full_name_trgm", "full_name", postgresql_using="gin", postgresql_ops={"full_name": "gin_trgm_ops"}),
+        Index("ix_profiles_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+        Index("ix_profiles_phone_trgm", "phone", postgresql_using="gin", postgresql_ops={"phone": "gin_trgm_ops"}),
+    )
 
     id: Mapped[str] = mapped_column(
         UUID(as_uuid=False), primary_key=True
@@ -29,3 +36,6 @@ class Profile(Base):
 
     trainer: Mapped[Optional["Trainer"]] = relationship(back_populates="profile", uselist=False)
     client:  Mapped[Optional["Client"]]  = relationship(back_populates="profile", uselist=False)
+
+
+event.listen(Profile.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from typing import Optional, List
 
-from sqlalchemy import Text, ForeignKey
+from sqlalchemy import Text, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -12,6 +12,12 @@ from app.db.base import Base
 
 class Trainer(Base):
     __tablename__ = "trainers"
+    __table_args__ = (
+        # keyset pagination of an organization's trainers: WHERE org_id = ? AND id > ? ORDER BY id
+        Index("ix_trainers_org_id_id", "org_id", "id"),
+        # certifications @> ARRAY[...] filters
+        Index("ix_trainers_certifications", "certifications", postgresql_using="gin"),
+    )
 
     # PK is also FK → profiles.id
     id: Mapped[str] = mapped_column(
@@ -32,7 +38,6 @@ class Trainer(Base):
         UUID(as_uuid=False),
         ForeignKey("organizations.org_id", ondelete="SET NULL"),
         nullable=True,
-        index=True,
     )
 
     profile = relationship("Profile", back_populates="trainer", uselist=False)
@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict
+
+class OrganizationTrainerOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: str
+    name: Optional[str] = None
+    email: str
+    phone: Optional[str] = None
+    is_active: bool
+    bio: Optional[str] = None
+    certifications: Optional[List[str]] = None
+    years_exp: Optional[int] = None
+
+class OrganizationTrainerPage(BaseModel):
+    items: List[OrganizationTrainerOut]
+    next_cursor: Optional[str] = None      # pass back as ?cursor= for the next page; null on the last page
+
+class OrganizationSummaryOut(BaseModel):
+    org_id: str
+    name: str
+    address: Optional[str] = None
+    trainer_count: int
+    avg_years_exp: Optional[float] = None  # over trainers that have years_exp
+    stats_updated_at: Optional[datetime] = None
+
+class OrganizationSummaryPage(BaseModel):
+    items: List[OrganizationSummaryOut]
+    next_cursor: Optional[str] = None
+
+class OrganizationStatsRebuildResult(BaseModel):
+    organizations: int                     # stats rows written
@@ -1,5 +1,6 @@
 from typing import Optional, Union, List
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from uuid import UUID
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, SerializeAsAny
 from app.models.enums import UserRole
 
 class ProfileBase(BaseModel):
@@ -22,6 +23,16 @@ class ProfileRegister(ProfileBase):
     trainer: Optional[RegisterTrainerFields] = None
     client: Optional[RegisterClientFields] = None
 
+class ProfileImportRow(ProfileRegister):
+    """
+    One row of an admin bulk import. The id is the user's existing Supabase
+    Auth id (profiles.id references it); a password hash may replace the password.
+    """
+    id: UUID
+    password: Optional[str] = Field(default=None, min_length=8)
+    password_hash: Optional[str] = None
+    is_active: bool = False
+
 class ProfileOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: str
@@ -33,7 +44,55 @@ class ProfileOut(BaseModel):
 
     # class Config:
     #     from_attributes = True
-        
+
+# Related rows returned when a read asks for include=trainer,client,organization
+INCLUDE_OPTIONS = frozenset({"trainer", "client", "organization"})
+
+class OrganizationOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    org_id: str
+    name: str
+    address: Optional[str] = None
+
+class TrainerOut(BaseModel):
+    bio: Optional[str] = None
+    certifications: Optional[List[str]] = None
+    years_exp: Optional[int] = None
+    organization_id: Optional[str] = None
+    organization: Optional[OrganizationOut] = None
+
+class ClientOut(BaseModel):
+    fitness_goal: Optional[str] = None
+
+class ProfileDetailOut(ProfileOut):
+    trainer: Optional[TrainerOut] = None
+    client: Optional[ClientOut] = None
+
+    @classmethod
+    def from_profile(cls, profile, include: frozenset) -> "ProfileDetailOut":
+        """
+        Build from an ORM Profile whose relationships were eager-loaded for `include`.
+        Only touches relationships that were requested, so nothing lazy-loads.
+        """
+        data = ProfileOut.model_validate(profile, from_attributes=True).model_dump()
+        if "trainer" in include or "organization" in include:
+            t = profile.trainer
+            if t is not None:
+                org = t.organization if "organization" in include else None
+                data["trainer"] = TrainerOut(
+                    bio=t.bio,
+                    certifications=t.certifications,
+                    years_exp=t.years_exp,
+                    organization_id=t.organization_id,
+                    organization=(OrganizationOut.model_validate(org) if org is not None else None),
+                )
+            else:
+                data["trainer"] = None
+        if "client" in include:
+            c = profile.client
+            data["client"] = ClientOut(fitness_goal=c.fitness_goal) if c is not None else None
+        return cls(**data)
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -43,6 +102,50 @@ class Login(BaseModel):
     email: EmailStr
     password: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class AuthData(BaseModel):
-    token: Token
-    profile: ProfileOut
+    token: Optional[Token] = None           # None until the email is confirmed
+    profile: SerializeAsAny[ProfileOut]    # may be a ProfileDetailOut
+
+class ProfileRegisterBatch(BaseModel):
+    items: List[ProfileRegister] = Field(min_length=1)
+
+class RegisterBatchItemResult(BaseModel):
+    index: int                             # position in the request
+    email: str
+    success: bool
+    id: Optional[str] = None
+    message: Optional[str] = None
+
+class RegisterBatchResult(BaseModel):
+    created: int
+    failed: int
+    results: List[RegisterBatchItemResult]
+
+class ProfileLookupRequest(BaseModel):
+    ids: List[UUID] = Field(min_length=1)
+
+class ProfileLookupResult(BaseModel):
+    profiles: List[SerializeAsAny[ProfileOut]]   # found profiles, in request order
+    missing: List[str]                     # requested ids with no profile
+
+class ProfileImportError(BaseModel):
+    line: int                              # 1-based record number in the input
+    email: Optional[str] = None
+    message: str
+
+class ProfileImportReport(BaseModel):
+    rows: int                              # records read
+    invalid: int                           # rejected by validation
+    inserted: int                          # new profiles
+    skipped: int                           # valid, but the id or email already existed
+    trainers: int
+    clients: int
+    seconds: float
+    rows_per_second: float
+    errors: List[ProfileImportError]       # first IMPORT_MAX_ERRORS validation errors
+
+class ProfileSearchResult(BaseModel):
+    items: List[ProfileOut]                # best matches first
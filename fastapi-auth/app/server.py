@@ -1,12 +1,48 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.db.session import engine
+from app.db.session import get_engine, get_pool_stats, get_replica_stats, routing_stats
+from app.core import metrics
 from app.db.base import Base
 from app.core.config import settings
 from app.models import organization as _organization, profile as _profile, trainer as _trainer, client as _client
+from app.models import organization_stats as _organization_stats
 from app.api.v1.endpoints import auth as auth_router
+from app.api.v1.endpoints import profiles as profiles_router
+from app.api.v1.endpoints import organizations as organizations_router
+from app.api.v1.endpoints import admin as admin_router
+from app.services.supabase_auth import open_http_client, close_http_client, refresh_cache, refresh_flight, gotrue
+from app.core.security import shutdown_hash_executor, token_cache
+from app.crud.profile import crud_profile
+from app.crud.organization import crud_organization
+from app.utils.responses import ApiJSONResponse
+from app.core.log import setup_logging
+from app.core import rate_limit
+from app.core.middleware import RequestContextMiddleware, MetricsMiddleware
 
-app = FastAPI(title="Auth API (Supabase)", version="1.0.0")
+setup_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Dev convenience; disable in prod
+    if settings.RUN_DB_CREATE_ALL:
+        async with get_engine().begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    await open_http_client()
+    try:
+        yield
+    finally:
+        await close_http_client()
+        shutdown_hash_executor()
+
+app = FastAPI(
+    title="Auth API (Supabase)",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ApiJSONResponse,
+)
 
 # would need to update according to frontend urls
 app.add_middleware(
@@ -15,16 +51,16 @@ app.add_middleware(
     allow_credentials=False,     
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
-
-@app.on_event("startup")
-async def on_startup():
-    # Dev convenience; disable in prod
-    if settings.RUN_DB_CREATE_ALL:
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+app.add_middleware(RequestContextMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth_router.router, prefix="/api/v1/auth")
+app.include_router(profiles_router.router, prefix="/api/v1/profiles")
+app.include_router(organizations_router.router, prefix="/api/v1/organizations")
+app.include_router(admin_router.router, prefix="/api/v1/admin")
 
 @app.get("/")
 async def root():
@@ -33,3 +69,48 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+@app.get("/health/db")
+async def health_db():
+    return {"status": "ok", "pool": get_pool_stats(), "replicas": get_replica_stats()}
+
+
+def _collect_runtime_stats():
+    pool = get_pool_stats()
+    yield ("db_pool_checkouts_total", "counter", "Connections handed out by the pool.", [({}, pool["checkouts"])])
+    yield ("db_pool_connects_total", "counter", "New DB connections opened.", [({}, pool["connects"])])
+    yield ("db_pool_timeouts_total", "counter", "Pool checkouts that timed out.", [({}, pool["timeouts"])])
+    yield ("db_read_routing_total", "counter", "Replica-eligible reads by where they were sent.",
+           [({"target": target}, n) for target, n in routing_stats.items()])
+    replicas = get_replica_stats()
+    yield ("db_replica_circuit_open", "gauge", "Read replica circuit breaker open (1) or not (0).",
+           [({"replica": r["name"]}, int(r["state"] == "open")) for r in replicas])
+    yield ("db_replica_reads_total", "counter", "Queries bound to each read replica.",
+           [({"replica": r["name"]}, r["reads"]) for r in replicas])
+    caches = [("token", token_cache.stats()), ("refresh", refresh_cache.stats())]
+    if crud_profile.cache is not None:
+        caches.append(("profile", crud_profile.cache.stats()))
+    if crud_organization.summary_cache is not None:
+        caches.append(("org_summary", crud_organization.summary_cache.stats()))
+    yield ("cache_hits_total", "counter", "In-process cache hits.", [({"cache": n}, s["hits"]) for n, s in caches])
+    yield ("cache_misses_total", "counter", "In-process cache misses.", [({"cache": n}, s["misses"]) for n, s in caches])
+    yield ("cache_entries", "gauge", "Entries currently cached.", [({"cache": n}, s["size"]) for n, s in caches])
+    upstream = gotrue.stats()
+    states = ("closed", "half_open", "open")
+    yield ("supabase_circuit_state", "gauge", "GoTrue circuit breaker state (1 = current).",
+           [({"state": st}, int(upstream["state"] == st)) for st in states])
+    yield ("supabase_circuit_rejections_total", "counter", "GoTrue calls rejected by the open breaker.", [({}, upstream["rejections"])])
+    yield ("supabase_retries_total", "counter", "GoTrue retries sent.", [({}, upstream["retries"])])
+    yield ("supabase_hedges_total", "counter", "Hedged GoTrue requests sent.", [({}, upstream["hedges"])])
+    yield ("supabase_deadlines_exceeded_total", "counter", "GoTrue calls that ran out of deadline.", [({}, upstream["deadlines_exceeded"])])
+    yield ("rate_limit_rejections_total", "counter", "Requests rejected with 429.",
+           [({"scope": scope, "key": kind}, n) for (scope, kind), n in list(rate_limit.rejections.items())])
+    flight = refresh_flight.stats()
+    yield ("supabase_refresh_calls_total", "counter", "Refresh grants sent to GoTrue.", [({}, flight["calls"])])
+    yield ("supabase_refresh_coalesced_total", "counter", "Refreshes that joined an in-flight grant.", [({}, flight["coalesced"])])
+
+metrics.register_collector(_collect_runtime_stats)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
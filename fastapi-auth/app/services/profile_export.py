@@ -0,0 +1,112 @@
+# app/services/profile_export.py
+"""
+Streaming export of profiles joined with their trainer / client rows.
+
+Rows come from a server-side cursor (AsyncSession.stream) EXPORT_BATCH_SIZE at
+a time, and each batch is encoded into one chunk of the response body. The
+next batch is only fetched once the ASGI server has accepted the previous
+chunk, so a slow client throttles the cursor instead of filling memory.
+Password hashes are never selected. With read replicas configured, the
+export reads from one of them.
+"""
+import csv
+import io
+import json
+import logging
+from typing import AsyncIterator, Callable, List, Sequence
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import get_sessionmaker, replica_reads
+from app.models.client import Client
+from app.models.profile import Profile
+from app.models.trainer import Trainer
+
+logger = logging.getLogger(__name__)
+
+# output field -> column; profile columns use their API names
+EXPORT_FIELDS = ("id", "name", "email", "phone", "user_type", "is_active",
+                 "bio", "certifications", "years_exp", "organization_id", "fitness_goal")
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def build_export_query():
+    profiles, trainers, clients = Profile.__table__, Trainer.__table__, Client.__table__
+    return (
+        select(
+            profiles.c.id,
+            profiles.c.full_name.label("name"),
+            profiles.c.email,
+            profiles.c.phone,
+            profiles.c.role.label("user_type"),
+            profiles.c.onboarded.label("is_active"),
+            trainers.c.bio,
+            trainers.c.certifications,
+            trainers.c.years_exp,
+            trainers.c.org_id.label("organization_id"),
+            clients.c.fitness_goal,
+        )
+        .select_from(profiles)
+        .outerjoin(trainers, trainers.c.id == profiles.c.id)
+        .outerjoin(clients, clients.c.id == profiles.c.id)
+    )
+
+
+def _plain(row: Sequence) -> list:
+    values = list(row)
+    role = values[4]
+    values[4] = role.value if role is not None else None
+    return values
+
+
+def encode_ndjson(rows: List[Sequence]) -> bytes:
+    return b"".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, _plain(row))), separators=(",", ":")).encode() + b"\n"
+        for row in rows
+    )
+
+
+def encode_csv(rows: List[Sequence]) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        values = _plain(row)
+        certs = values[7]
+        values[7] = ",".join(certs) if certs is not None else None
+        writer.writerow(values)
+    return buf.getvalue().encode()
+
+
+def _csv_header() -> bytes:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(EXPORT_FIELDS)
+    return buf.getvalue().encode()
+
+
+async def export_profiles(fmt: str) -> AsyncIterator[bytes]:
+    """
+    Yield the export as body chunks: the first chunk (header and/or first
+    batch) is always produced, even for an empty table, so callers can await
+    it to surface connection errors before the response starts.
+    The session is owned by the generator and closed when it finishes or is
+    closed (e.g. on client disconnect).
+    """
+    encode: Callable[[List[Sequence]], bytes] = encode_csv if fmt == "csv" else encode_ndjson
+    rows = 0
+    async with get_sessionmaker()() as db:
+        with replica_reads(db):
+            result = await db.stream(
+                build_export_query().execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+            )
+        first = _csv_header() if fmt == "csv" else b""
+        async for batch in result.partitions():
+            rows += len(batch)
+            chunk = encode(batch)
+            if first is not None:
+                chunk, first = first + chunk, None
+            yield chunk
+        if first is not None:
+            yield first
+    logger.info("Profile export finished", extra={"format": fmt, "rows": rows})
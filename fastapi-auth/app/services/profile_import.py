@@ -0,0 +1,364 @@
+# app/services/profile_import.py
+"""
+Bulk import of profiles, with their trainer / client rows, from CSV or NDJSON.
+
+Records are validated against ProfileImportRow in batches of IMPORT_BATCH_SIZE.
+Each valid batch is COPY'd (asyncpg copy_records_to_table) into temporary
+staging tables and merged by a single INSERT ... SELECT statement, one
+transaction per batch:
+
+  - profiles whose id or email already exists are skipped (ON CONFLICT DO
+    NOTHING), so an interrupted import can simply be run again;
+  - trainer / client rows are written only for profiles inserted by the batch;
+  - organization_stats is bumped for the new trainers in the same statement.
+
+Input columns are those of the admin export (id, name, email, phone,
+user_type, is_active, bio, certifications, years_exp, organization_id,
+fitness_goal) plus password_hash / password; NDJSON may also use the nested
+register shape ({"trainer": {...}}). No Supabase Auth users are created, so
+every row must carry the id of an existing auth user; rows without one are
+rejected like any other invalid row. A plain `password` is
+bcrypt-hashed, which caps throughput at the hash pool's speed.
+
+    python -m app.services.profile_import members.csv
+    python -m app.services.profile_import members.ndjson --batch-size 10000
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import uuid
+from time import perf_counter
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import Boolean, Column, Integer, MetaData, Table, Text, cast, func, insert, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, insert as pg_insert
+from sqlalchemy.schema import CreateTable
+
+from app.core.config import settings
+from app.core.security import PasswordHasherBusy, hash_password_async
+from app.crud.organization import add_to_stats_on_conflict, crud_organization
+from app.crud.profile import normalize_client_fields, normalize_trainer_fields
+from app.db.session import get_sessionmaker
+from app.models.client import Client
+from app.models.enums import UserRole
+from app.models.organization import Organization
+from app.models.organization_stats import OrganizationStats
+from app.models.profile import Profile
+from app.models.trainer import Trainer
+from app.schemas.profile import ProfileImportError, ProfileImportReport, ProfileImportRow
+
+logger = logging.getLogger(__name__)
+
+TRAINER_KEYS = ("bio", "certifications", "years_exp", "organization_id")
+CLIENT_KEYS = ("fitness_goal",)
+
+# Staging tables live in the session's temp schema and are dropped at commit
+_staging = MetaData()
+staging_profiles = Table(
+    "import_profiles", _staging,
+    Column("id", UUID(as_uuid=False)),
+    Column("full_name", Text),
+    Column("email", Text),
+    Column("password", Text),
+    Column("phone", Text),
+    Column("role", Text),
+    Column("onboarded", Boolean),
+    prefixes=["TEMPORARY"], postgresql_on_commit="DROP",
+)
+staging_trainers = Table(
+    "import_trainers", _staging,
+    Column("id", UUID(as_uuid=False)),
+    Column("bio", Text),
+    Column("certifications", ARRAY(Text)),
+    Column("years_exp", Integer),
+    Column("org_id", UUID(as_uuid=False)),
+    prefixes=["TEMPORARY"], postgresql_on_commit="DROP",
+)
+staging_clients = Table(
+    "import_clients", _staging,
+    Column("id", UUID(as_uuid=False)),
+    Column("fitness_goal", Text),
+    prefixes=["TEMPORARY"], postgresql_on_commit="DROP",
+)
+
+
+def build_merge():
+    """
+    staging tables -> profiles / trainers / clients / organization_stats in one
+    statement; returns one row with the inserted / trainers / clients counts.
+    """
+    profiles, trainers, clients = Profile.__table__, Trainer.__table__, Client.__table__
+    sp, st, sc = staging_profiles, staging_trainers, staging_clients
+
+    inserted = (
+        pg_insert(profiles)
+        .from_select(
+            ["id", "full_name", "email", "password", "phone", "role", "onboarded"],
+            select(sp.c.id, sp.c.full_name, sp.c.email, sp.c.password, sp.c.phone,
+                   cast(sp.c.role, profiles.c.role.type), sp.c.onboarded),
+        )
+        .on_conflict_do_nothing()
+        .returning(profiles.c.id)
+        .cte("inserted")
+    )
+    new_trainers = (
+        insert(trainers)
+        .from_select(
+            ["id", "bio", "certifications", "years_exp", "org_id"],
+            select(st.c.id, st.c.bio, st.c.certifications, st.c.years_exp, st.c.org_id)
+            .select_from(st.join(inserted, inserted.c.id == st.c.id)),
+        )
+        .returning(trainers.c.org_id, trainers.c.years_exp)
+        .cte("new_trainers")
+    )
+    new_clients = (
+        insert(clients)
+        .from_select(
+            ["id", "fitness_goal"],
+            select(sc.c.id, sc.c.fitness_goal).select_from(sc.join(inserted, inserted.c.id == sc.c.id)),
+        )
+        .returning(clients.c.id)
+        .cte("new_clients")
+    )
+    new_stats = add_to_stats_on_conflict(
+        pg_insert(OrganizationStats.__table__).from_select(
+            ["org_id", "trainer_count", "years_exp_sum", "years_exp_count"],
+            select(
+                new_trainers.c.org_id,
+                func.count(),
+                func.coalesce(func.sum(new_trainers.c.years_exp), 0),
+                func.count(new_trainers.c.years_exp),
+            )
+            .where(new_trainers.c.org_id.isnot(None))
+            .group_by(new_trainers.c.org_id)
+            .order_by(new_trainers.c.org_id),
+        )
+    ).cte("new_org_stats")
+    return select(
+        select(func.count()).select_from(inserted).scalar_subquery().label("inserted"),
+        select(func.count()).select_from(new_trainers).scalar_subquery().label("trainers"),
+        select(func.count()).select_from(new_clients).scalar_subquery().label("clients"),
+    ).add_cte(new_stats)
+
+
+def read_records(stream: IO[str], fmt: str) -> Iterator[Union[dict, str]]:
+    """CSV rows as dicts; NDJSON as raw lines (parsed per record so one bad line is one error)."""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield line
+
+
+def _payload(raw: Union[dict, str]) -> dict:
+    """Flat export-style record -> ProfileImportRow input. Empty cells / nulls fall back to the defaults."""
+    record = json.loads(raw) if isinstance(raw, str) else raw
+    if not isinstance(record, dict):
+        raise ValueError("record is not an object")
+    data = {k: v for k, v in record.items() if k is not None and v is not None and v != ""}
+    trainer = {k: data.pop(k) for k in TRAINER_KEYS if k in data}
+    client = {k: data.pop(k) for k in CLIENT_KEYS if k in data}
+    if trainer and "trainer" not in data:
+        data["trainer"] = trainer
+    if client and "client" not in data:
+        data["client"] = client
+    return data
+
+
+def _error_message(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+    if isinstance(e, json.JSONDecodeError):
+        return "invalid JSON"
+    return str(e)
+
+
+class _Import:
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self.rows = self.invalid = self.inserted = self.trainers = self.clients = 0
+        self.errors: List[ProfileImportError] = []
+
+    def reject(self, line: int, email: Optional[str], message: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < settings.IMPORT_MAX_ERRORS:
+            self.errors.append(ProfileImportError(line=line, email=email, message=message))
+
+    async def _hash_passwords(self, batch: List[Tuple[int, ProfileImportRow]]) -> List[Tuple[int, ProfileImportRow, Optional[str]]]:
+        # same bounded fan-out into the hash pool as /register/batch
+        sem = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+
+        async def hash_one(row: ProfileImportRow) -> Optional[str]:
+            if row.password_hash is not None or row.password is None:
+                return row.password_hash
+            async with sem:
+                return await hash_password_async(row.password)
+
+        hashes = await asyncio.gather(*(hash_one(row) for _, row in batch), return_exceptions=True)
+        hashed = []
+        for (line, row), result in zip(batch, hashes):
+            if isinstance(result, PasswordHasherBusy):
+                self.reject(line, row.email, "password hashing capacity exhausted")
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                hashed.append((line, row, result))
+        return hashed
+
+    async def flush(self, batch: List[Tuple[int, ProfileImportRow]]) -> None:
+        if not batch:
+            return
+        hashed = await self._hash_passwords(batch)
+
+        profile_records, trainer_records, client_records = [], [], []
+        pending_trainers = []
+        seen_ids = set()
+        for line, row, password in hashed:
+            id = str(row.id)
+            if id in seen_ids:
+                continue  # repeated id in the batch: skipped like an existing profile
+            seen_ids.add(id)
+            profile_records.append((
+                id, row.name, row.email, password, row.phone,
+                row.user_type.value if row.user_type else None, row.is_active,
+            ))
+            if row.user_type == UserRole.trainer:
+                fields = normalize_trainer_fields(row.trainer.model_dump() if row.trainer else None, email=row.email)
+                pending_trainers.append((line, row.email, id, fields))
+            elif row.user_type == UserRole.client:
+                fields = normalize_client_fields(row.client.model_dump() if row.client else None)
+                client_records.append((id, fields["fitness_goal"]))
+
+        async with get_sessionmaker()() as db:
+            # trainers pointing at an unknown organization would fail the whole batch on the FK
+            org_ids = set()
+            for line, email, id, fields in pending_trainers:
+                if fields["org_id"] is not None:
+                    try:
+                        fields["org_id"] = str(uuid.UUID(str(fields["org_id"])))
+                    except ValueError:
+                        continue  # never matches a known organization below
+                    org_ids.add(fields["org_id"])
+            known = set()
+            if org_ids:
+                res = await db.execute(select(Organization.org_id).where(Organization.org_id.in_(org_ids)))
+                known = set(res.scalars().all())
+            rejected_ids = set()
+            for line, email, id, fields in pending_trainers:
+                if fields["org_id"] is not None and fields["org_id"] not in known:
+                    self.reject(line, email, "trainer.organization_id: unknown organization")
+                    rejected_ids.add(id)
+                    continue
+                trainer_records.append((id, fields["bio"], fields["certifications"], fields["years_exp"], fields["org_id"]))
+            if rejected_ids:
+                profile_records = [r for r in profile_records if r[0] not in rejected_ids]
+
+            try:
+                conn = await db.connection()
+                for table in (staging_profiles, staging_trainers, staging_clients):
+                    await conn.execute(CreateTable(table))
+                apg = (await conn.get_raw_connection()).driver_connection
+                for table, records in (
+                    (staging_profiles, profile_records),
+                    (staging_trainers, trainer_records),
+                    (staging_clients, client_records),
+                ):
+                    if records:
+                        await apg.copy_records_to_table(table.name, records=records, columns=[c.name for c in table.columns])
+                counts = (await conn.execute(build_merge())).mappings().one()
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                logger.exception("Import batch FAILED", extra={"count": len(profile_records)})
+                raise
+
+        self.inserted += counts["inserted"]
+        self.trainers += counts["trainers"]
+        self.clients += counts["clients"]
+        logger.info("Import batch OK", extra={"rows": len(profile_records), "inserted": counts["inserted"]})
+
+    async def run(self, records: Iterable[Union[dict, str]]) -> None:
+        # Validation is CPU-bound and the merge mostly waits on Postgres, so the
+        # next batch is validated while the previous one is being written
+        # (at most one batch in flight, two in memory).
+        batch: List[Tuple[int, ProfileImportRow]] = []
+        inflight: Optional[asyncio.Future] = None
+        try:
+            for line, raw in enumerate(records, start=1):
+                self.rows += 1
+                if inflight is not None and line % 100 == 0:
+                    await asyncio.sleep(0)  # let the in-flight batch make progress
+                try:
+                    batch.append((line, ProfileImportRow.model_validate(_payload(raw))))
+                except (ValidationError, ValueError) as e:
+                    email = raw.get("email") if isinstance(raw, dict) else None
+                    self.reject(line, email, _error_message(e))
+                    continue
+                if len(batch) >= self.batch_size:
+                    if inflight is not None:
+                        await inflight
+                    inflight = asyncio.ensure_future(self.flush(batch))
+                    batch = []
+            if inflight is not None:
+                await inflight
+                inflight = None
+            await self.flush(batch)
+        finally:
+            if inflight is not None and not inflight.done():
+                inflight.cancel()
+
+
+async def import_profiles(records: Iterable[Union[dict, str]], *, batch_size: Optional[int] = None) -> ProfileImportReport:
+    """Validate and load `records` (see read_records). DB errors abort the import; committed batches stay."""
+    started = perf_counter()
+    job = _Import(batch_size or settings.IMPORT_BATCH_SIZE)
+    await job.run(records)
+    if crud_organization.summary_cache is not None:
+        crud_organization.summary_cache.clear()
+    seconds = perf_counter() - started
+    report = ProfileImportReport(
+        rows=job.rows,
+        invalid=job.invalid,
+        inserted=job.inserted,
+        skipped=job.rows - job.invalid - job.inserted,
+        trainers=job.trainers,
+        clients=job.clients,
+        seconds=round(seconds, 3),
+        rows_per_second=round(job.rows / seconds, 1) if seconds > 0 else 0.0,
+        errors=job.errors,
+    )
+    logger.info("Profile import finished", extra=report.model_dump(exclude={"errors"}))
+    return report
+
+
+def detect_format(filename: str) -> str:
+    return "csv" if filename.lower().endswith(".csv") else "ndjson"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    with io.open(args.path, encoding="utf-8-sig", newline="") as f:
+        report = asyncio.run(import_profiles(read_records(f, fmt), batch_size=args.batch_size))
+
+    for err in report.errors:
+        print(f"  line {err.line} ({err.email or '-'}): {err.message}")
+    print(
+        f"{report.rows} rows: {report.inserted} inserted, {report.skipped} skipped (already present), "
+        f"{report.invalid} invalid; {report.trainers} trainers, {report.clients} clients"
+    )
+    print(f"{report.seconds:.2f}s, {report.rows_per_second:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# app/services/resilience.py
+"""
+Failure handling for calls to an upstream service:
+
+  CircuitBreaker  - after N consecutive failures, reject calls immediately for
+                    `reset_timeout` seconds, then let a single probe through.
+  RetryBudget     - caps retries (and hedges) to a fraction of normal traffic
+                    so retries cannot multiply load on a struggling upstream.
+  Upstream.call   - runs one logical call under a deadline, with jittered
+                    backoff retries and an optional hedged second request
+                    (idempotent calls only).
+
+Callers signal "the upstream is unhealthy" by raising TransientUpstreamError
+(transport errors, 5xx, 429); any other outcome counts as a healthy response.
+Everything here runs on the event loop and is not thread-safe.
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class TransientUpstreamError(Exception):
+    """The upstream failed in a way worth retrying (timeout, connection error, 5xx, 429)."""
+    pass
+
+class DeadlineExceeded(TransientUpstreamError):
+    """The call's overall deadline ran out."""
+    pass
+
+class CircuitOpenError(RuntimeError):
+    """The breaker is open; the call was rejected without contacting the upstream."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"circuit '{name}' is open, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self.rejections = 0
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now."""
+        if self.state == self.CLOSED:
+            return
+        now = time.monotonic()
+        if now - self.opened_at >= self.reset_timeout:
+            # one probe per reset window; its outcome closes or re-opens the circuit
+            self.state = self.HALF_OPEN
+            self.opened_at = now
+            return
+        self.rejections += 1
+        raise CircuitOpenError(self.name, self.reset_timeout - (now - self.opened_at))
+
+    def record_success(self) -> None:
+        self.failures = 0
+        if self.state != self.CLOSED:
+            logger.info("Circuit closed", extra={"circuit": self.name})
+            self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.OPEN:
+            return
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            logger.warning("Circuit opened", extra={"circuit": self.name, "failures": self.failures})
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.opens += 1
+
+
+class RetryBudget:
+    """
+    Token bucket shared by all calls: every call deposits `ratio` tokens, every
+    retry or hedge withdraws one. `min_per_second` keeps a trickle of retries
+    available at low traffic. The balance is capped at `max_tokens`.
+    """
+
+    def __init__(self, ratio: float, min_per_second: float, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.balance = max_tokens
+        self._refilled_at = time.monotonic()
+        self.exhausted = 0
+
+    def deposit(self) -> None:
+        self.balance = min(self.max_tokens, self.balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        now = time.monotonic()
+        self.balance = min(self.max_tokens, self.balance + (now - self._refilled_at) * self.min_per_second)
+        self._refilled_at = now
+        if self.balance >= 1.0:
+            self.balance -= 1.0
+            return True
+        self.exhausted += 1
+        return False
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff for the retry after `attempt` (1-based)."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+@dataclass(frozen=True)
+class CallPolicy:
+    deadline: float                       # seconds for the whole call, retries included
+    idempotent: bool = False              # only idempotent calls are retried or hedged
+    max_attempts: int = 1
+    hedge_delay: Optional[float] = None   # send a second request if the first is this slow
+
+
+class Upstream:
+    """One remote dependency: a breaker, a retry budget and call counters."""
+
+    def __init__(self, name: str, breaker: CircuitBreaker, budget: RetryBudget, backoff_base: float, backoff_max: float):
+        self.name = name
+        self.breaker = breaker
+        self.budget = budget
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.calls = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadlines_exceeded = 0
+
+    async def call(self, fn: Callable[[float], Awaitable[T]], policy: CallPolicy) -> T:
+        """
+        Run `fn(timeout)` under `policy`. `timeout` is the time left before the
+        deadline; fn should bound its own I/O by it. Raises CircuitOpenError,
+        DeadlineExceeded, the last TransientUpstreamError, or whatever fn raises.
+        """
+        self.breaker.before_call()
+        self.calls += 1
+        self.budget.deposit()
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + policy.deadline
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = deadline_at - loop.time()
+            try:
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"{self.name}: deadline of {policy.deadline}s exceeded")
+                if policy.idempotent and policy.hedge_delay is not None:
+                    result = await self._hedged(fn, deadline_at, policy.hedge_delay)
+                else:
+                    result = await self._attempt(fn, remaining)
+            except TransientUpstreamError as e:
+                self.breaker.record_failure()
+                if isinstance(e, DeadlineExceeded):
+                    self.deadlines_exceeded += 1
+                if not policy.idempotent or attempt >= policy.max_attempts or isinstance(e, DeadlineExceeded):
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                if loop.time() + delay >= deadline_at or not self.budget.try_spend():
+                    raise
+                await asyncio.sleep(delay)
+                self.breaker.before_call()
+                self.retries += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def _attempt(self, fn: Callable[[float], Awaitable[T]], remaining: float) -> T:
+        try:
+            return await asyncio.wait_for(fn(remaining), remaining)
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceeded(f"{self.name}: deadline exceeded") from e
+
+    async def _hedged(self, fn: Callable[[float], Awaitable[T]], deadline_at: float, hedge_delay: float) -> T:
+        loop = asyncio.get_running_loop()
+        tasks = [asyncio.ensure_future(fn(deadline_at - loop.time()))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=min(hedge_delay, max(0.0, deadline_at - loop.time())))
+            if not done and loop.time() < deadline_at and self.budget.try_spend():
+                self.hedges += 1
+                tasks.append(asyncio.ensure_future(fn(deadline_at - loop.time())))
+
+            pending = set(tasks)
+            last_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, deadline_at - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise DeadlineExceeded(f"{self.name}: deadline exceeded")
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            self.hedge_wins += 1
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.breaker.state,
+            "opens": self.breaker.opens,
+            "rejections": self.breaker.rejections,
+            "calls": self.calls,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "deadlines_exceeded": self.deadlines_exceeded,
+            "retry_budget_exhausted": self.budget.exhausted,
+        }
@@ -1,8 +1,25 @@
-import httpx
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import TYPE_CHECKING
 from app.core.config import settings
+from app.core.metrics import timed
+from app.core.security import create_supabase_access_token
+from app.services.resilience import (
+    CallPolicy, CircuitBreaker, CircuitOpenError, RetryBudget, TransientUpstreamError, Upstream,
+)
+from app.utils.cache import TTLCache
+from app.utils.singleflight import SingleFlight
 from pydantic import BaseModel
 
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
 class SupabaseSession(BaseModel):
+    # no tokens while the user still has to confirm their email
     access_token: str | None
     refresh_token: str | None
     user_id: str
@@ -10,22 +27,197 @@ class SupabaseSession(BaseModel):
 class SupabaseAuthError(RuntimeError):
     pass
 
+class SupabaseUserExistsError(SupabaseAuthError):
+    """GoTrue rejected the signup because the email is already registered."""
+    pass
+
+class SupabaseInvalidGrantError(SupabaseAuthError):
+    """GoTrue rejected the grant itself (e.g. a revoked, reused or expired refresh token)."""
+    pass
+
+class SupabaseUnavailableError(SupabaseAuthError):
+    """GoTrue is failing, too slow, or the circuit breaker is open; says nothing about the credentials."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+# One pooled client per process so GoTrue calls reuse keep-alive connections
+# instead of paying a TCP + TLS handshake on every request.
+_http_client: httpx.AsyncClient | None = None
+
+def _timeout(total: float) -> httpx.Timeout:
+    import httpx
+    return httpx.Timeout(
+        total,
+        connect=settings.SUPABASE_CONNECT_TIMEOUT,
+        pool=settings.SUPABASE_POOL_TIMEOUT,
+    )
+
+def _build_http_client() -> httpx.AsyncClient:
+    # httpx is imported here, not at module import, to keep it off the cold-start path
+    import httpx
+    http2 = settings.SUPABASE_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("SUPABASE_HTTP2 is enabled but `h2` is not installed; falling back to HTTP/1.1")
+            http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.SUPABASE_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=_timeout(settings.SUPABASE_LOGIN_TIMEOUT),
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared GoTrue client, creating it on first use.
+    Normally opened by the app lifespan; the lazy path covers runtimes
+    (e.g. Vercel) that do not run lifespan events.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _build_http_client()
+    return _http_client
+
+# Circuit breaker + retry budget shared by every GoTrue call (see app/services/resilience.py)
+gotrue = Upstream(
+    "gotrue",
+    breaker=CircuitBreaker(
+        "gotrue",
+        failure_threshold=settings.SUPABASE_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.SUPABASE_BREAKER_RESET_SECONDS,
+    ),
+    budget=RetryBudget(ratio=settings.SUPABASE_RETRY_BUDGET_RATIO, min_per_second=settings.SUPABASE_RETRY_MIN_PER_SECOND),
+    backoff_base=settings.SUPABASE_RETRY_BACKOFF_BASE,
+    backoff_max=settings.SUPABASE_RETRY_BACKOFF_MAX,
+)
+
+async def _request(
+    method: str, url: str, *, headers: dict, json: dict | None = None, attempt_timeout: float, policy: CallPolicy
+) -> httpx.Response:
+    """
+    Send a request to GoTrue through the breaker. Each attempt is capped by
+    `attempt_timeout` and by what is left of `policy.deadline`. Transport
+    errors, 5xx and 429 count as upstream failures and end up as
+    SupabaseUnavailableError; any other response is returned to the caller.
+    """
+    import httpx
+
+    async def attempt(remaining: float) -> httpx.Response:
+        try:
+            resp = await get_http_client().request(
+                method, url, headers=headers, json=json, timeout=_timeout(min(attempt_timeout, remaining))
+            )
+        except httpx.TransportError as e:
+            raise TransientUpstreamError(f"{type(e).__name__}: {e}") from e
+        if resp.status_code >= 500 or resp.status_code == 429:
+            raise TransientUpstreamError(f"GoTrue returned {resp.status_code}: {resp.text[:200]}")
+        return resp
+
+    try:
+        return await gotrue.call(attempt, policy)
+    except CircuitOpenError as e:
+        raise SupabaseUnavailableError(str(e), retry_after=e.retry_after) from e
+    except TransientUpstreamError as e:
+        raise SupabaseUnavailableError(str(e)) from e
+
+async def open_http_client() -> None:
+    get_http_client()
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 async def signup_and_get_tokens(
     *, email: str, password: str, full_name: str | None = None, phone: str | None = None, role: str | None = None
 ) -> SupabaseSession:
     """
-    Create a user (confirmed) via Admin API, then sign in to get tokens.
-    Use this in your /register to return tokens immediately.
+    Create a user (confirmed) and return a session for it, so /register can
+    hand out tokens immediately. SIGNUP_TOKEN_MODE picks how the session is
+    obtained; only "password_grant" costs a second upstream call.
     """
+    mode = settings.SIGNUP_TOKEN_MODE
+    if mode == "signup":
+        return await signup_supabase_user(
+            email=email, password=password, full_name=full_name, phone=phone, role=role
+        )
+
     # Create user via Admin API
     user_id = await create_supabase_user(
         email=email, password=password, full_name=full_name, phone=phone, role=role
     )
+    if mode == "local":
+        # same claims and key as a GoTrue token; no refresh token
+        access_token = create_supabase_access_token(user_id, email=email)
+        return SupabaseSession(access_token=access_token, refresh_token=None, user_id=user_id)
+
     # Login to get tokens
     access_token, refresh_token, _ = await login_supabase_user(email=email, password=password)
     return SupabaseSession(access_token=access_token, refresh_token=refresh_token, user_id=user_id)
 
+# sign up via the public endpoint; returns the session in the same response
+@timed("supabase_signup")
+async def signup_supabase_user(
+    *,
+    email: str,
+    password: str,
+    full_name: str | None = None,
+    phone: str | None = None,
+    role: str | None = None,
+) -> SupabaseSession:
+    """
+    Create a user with GoTrue's /signup and return its session.
+    If the project requires email confirmation GoTrue returns no session,
+    and neither does this: the user has to confirm, then log in.
+    """
+    url = f"{settings.SUPABASE_URL}/auth/v1/signup"
+    headers = {
+        "apikey": settings.SUPABASE_ANON_KEY,
+        "Content-Type": "application/json",
+    }
+    payload = {
+        "email": email,
+        "password": password,
+        "data": {
+            "full_name": full_name,
+            "phone": phone,
+            "role": role,
+        },
+    }
+    # not idempotent: a retry after a lost response would hit "already registered"
+    resp = await _request(
+        "POST", url, headers=headers, json=payload,
+        attempt_timeout=settings.SUPABASE_CREATE_USER_TIMEOUT,
+        policy=CallPolicy(deadline=settings.SUPABASE_CREATE_USER_DEADLINE),
+    )
+    if resp.status_code in (400, 422) and ("exists" in resp.text or "already" in resp.text.lower()):
+        raise SupabaseUserExistsError(f"Signup failed: {resp.status_code} {resp.text}")
+    if resp.status_code not in (200, 201):
+        raise SupabaseAuthError(f"Signup failed: {resp.status_code} {resp.text}")
+
+    data = resp.json()
+    user = data.get("user") or data
+    user_id = user.get("id")
+    if not user_id:
+        raise SupabaseAuthError(f"No user id in response: {data}")
+    # with confirmations on, an existing email comes back as a fake user without identities
+    if user.get("identities") == []:
+        raise SupabaseUserExistsError("Signup failed: email already registered")
+
+    return SupabaseSession(
+        access_token=data.get("access_token"), refresh_token=data.get("refresh_token"), user_id=user_id
+    )
+
 # create user via Supabase Admin API
+@timed("supabase_create_user")
 async def create_supabase_user(
     *,
     email: str,
@@ -54,9 +246,14 @@ async def create_supabase_user(
             "role": role,
         },
     }
-    async with httpx.AsyncClient(timeout=20) as client:
-        resp = await client.post(url, headers=headers, json=payload)
+    resp = await _request(
+        "POST", url, headers=headers, json=payload,
+        attempt_timeout=settings.SUPABASE_CREATE_USER_TIMEOUT,
+        policy=CallPolicy(deadline=settings.SUPABASE_CREATE_USER_DEADLINE),
+    )
     # 200/201 typical; surface useful errors otherwise
+    if resp.status_code == 422 and ("email_exists" in resp.text or "already" in resp.text.lower()):
+        raise SupabaseUserExistsError(f"Create user failed: {resp.status_code} {resp.text}")
     if resp.status_code not in (200, 201):
         raise SupabaseAuthError(f"Create user failed: {resp.status_code} {resp.text}")
     data = resp.json()
@@ -66,7 +263,34 @@ async def create_supabase_user(
         raise SupabaseAuthError(f"No user id in response: {data}")
     return user_id
 
+# delete user via Supabase Admin API
+@timed("supabase_delete_user")
+async def delete_supabase_user(user_id: str) -> None:
+    """
+    Delete an Auth user via the Admin API, e.g. one whose profile row could
+    not be written. A user that is already gone counts as deleted.
+    Requires SUPABASE_SERVICE_ROLE_KEY.
+    """
+    url = f"{settings.SUPABASE_URL}/auth/v1/admin/users/{user_id}"
+    headers = {
+        "Authorization": f"Bearer {settings.SUPABASE_SERVICE_ROLE_KEY}",
+        "apikey": settings.SUPABASE_SERVICE_ROLE_KEY,
+    }
+    # idempotent, so safe to retry
+    resp = await _request(
+        "DELETE", url, headers=headers,
+        attempt_timeout=settings.SUPABASE_CREATE_USER_TIMEOUT,
+        policy=CallPolicy(
+            deadline=settings.SUPABASE_CREATE_USER_DEADLINE,
+            idempotent=True,
+            max_attempts=settings.SUPABASE_RETRY_MAX_ATTEMPTS,
+        ),
+    )
+    if resp.status_code not in (200, 204, 404):
+        raise SupabaseAuthError(f"Delete user failed: {resp.status_code} {resp.text}")
+
 
+@timed("supabase_login")
 async def login_supabase_user(email: str, password: str):
     """
     Password grant against Supabase GoTrue.
@@ -79,12 +303,75 @@ async def login_supabase_user(email: str, password: str):
     }
     payload = {"email": email, "password": password}
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.post(url, headers=headers, json=payload)
+    # the password grant only mints a session, so it is safe to retry and hedge
+    resp = await _request(
+        "POST", url, headers=headers, json=payload,
+        attempt_timeout=settings.SUPABASE_LOGIN_TIMEOUT,
+        policy=CallPolicy(
+            deadline=settings.SUPABASE_LOGIN_DEADLINE,
+            idempotent=True,
+            max_attempts=settings.SUPABASE_RETRY_MAX_ATTEMPTS,
+            hedge_delay=(settings.SUPABASE_HEDGE_DELAY_MS / 1000 if settings.SUPABASE_HEDGE_DELAY_MS else None),
+        ),
+    )
 
     if resp.status_code != 200:
         raise SupabaseAuthError(f"Login failed: {resp.status_code} {resp.text}")
 
     data = resp.json()
     # data contains access_token, refresh_token, token_type, user, etc.
-    return data["access_token"], data.get("refresh_token"), data.get("user", {}).get("id")
\ No newline at end of file
+    return data["access_token"], data.get("refresh_token"), data.get("user", {}).get("id")
+
+
+# Sessions from recent refreshes, keyed by sha256(refresh_token), plus the
+# refreshes currently in flight. Supabase rotates refresh tokens, so replaying
+# the new session to retries of the old token mirrors GoTrue's reuse interval.
+refresh_cache: TTLCache[SupabaseSession] = TTLCache(
+    max_size=settings.REFRESH_CACHE_MAX_SIZE, default_ttl=settings.REFRESH_CACHE_TTL_SECONDS
+)
+refresh_flight: SingleFlight[SupabaseSession] = SingleFlight()
+
+async def refresh_supabase_session(refresh_token: str) -> SupabaseSession:
+    """
+    Exchange a refresh token for a new session.
+    Concurrent calls with the same token share one upstream request, and the
+    result is served from `refresh_cache` for REFRESH_CACHE_TTL_SECONDS.
+    Raises SupabaseInvalidGrantError if GoTrue rejects the token.
+    """
+    key = hashlib.sha256(refresh_token.encode()).digest()
+    cached = refresh_cache.get(key)
+    if cached is not None:
+        return cached
+
+    async def refresh() -> SupabaseSession:
+        session = await _refresh_grant(refresh_token)
+        refresh_cache.set(key, session)
+        return session
+
+    return await refresh_flight.do(key, refresh)
+
+
+@timed("supabase_refresh")
+async def _refresh_grant(refresh_token: str) -> SupabaseSession:
+    url = f"{settings.SUPABASE_URL}/auth/v1/token?grant_type=refresh_token"
+    headers = {
+        "apikey": settings.SUPABASE_ANON_KEY,
+        "Content-Type": "application/json",
+    }
+    # refresh tokens rotate on use, so the grant is never retried or hedged
+    resp = await _request(
+        "POST", url, headers=headers, json={"refresh_token": refresh_token},
+        attempt_timeout=settings.SUPABASE_REFRESH_TIMEOUT,
+        policy=CallPolicy(deadline=settings.SUPABASE_REFRESH_DEADLINE),
+    )
+    if resp.status_code in (400, 401, 403):
+        raise SupabaseInvalidGrantError(f"Refresh failed: {resp.status_code} {resp.text}")
+    if resp.status_code != 200:
+        raise SupabaseAuthError(f"Refresh failed: {resp.status_code} {resp.text}")
+
+    data = resp.json()
+    return SupabaseSession(
+        access_token=data["access_token"],
+        refresh_token=data.get("refresh_token"),
+        user_id=(data.get("user") or {}).get("id", ""),
+    )
@@ -1,13 +1,42 @@
 # app/utils/responses.py
-from typing import Optional, TypeVar, Generic
+from typing import Any, Optional, TypeVar, Generic
 from fastapi import status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
 from app.schemas.response import ApiResponse
 from app.core.constants import MSG_SUCCESS, MSG_INTERNAL_ERROR
+from app.core.metrics import span
+
+try:
+    import orjson as _orjson
+except ImportError:  # optional speedup for plain dict/list content
+    _orjson = None
 
 T = TypeVar("T")
 
+# ok()/fail() build the unparameterized envelope with model_construct: the fields
+# are trusted, and `ApiResponse[T]` per call only re-resolved the same generic.
 def ok(data: T = None, message: str = MSG_SUCCESS, code: int = status.HTTP_200_OK) -> ApiResponse[T]:
-    return ApiResponse[T](success=True, code=code, message=message, data=data)
+    return ApiResponse.model_construct(success=True, code=code, message=message, data=data)
 
 def fail(message: str, code: int) -> ApiResponse[None]:
-    return ApiResponse[None](success=False, code=code, message=message, data=None)
+    return ApiResponse.model_construct(success=False, code=code, message=message, data=None)
+
+
+class ApiJSONResponse(JSONResponse):
+    """
+    JSONResponse that encodes pydantic models (e.g. an ApiResponse envelope)
+    straight to bytes with pydantic-core, skipping model_dump() + stdlib json.
+    Other content goes through orjson when it is installed.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with span("serialize"):
+            if isinstance(content, BaseModel):
+                return content.__pydantic_serializer__.to_json(content)
+            if _orjson is not None:
+                try:
+                    return _orjson.dumps(content)
+                except TypeError:
+                    pass
+            return super().render(content)
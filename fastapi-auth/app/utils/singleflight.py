@@ -0,0 +1,46 @@
+# app/utils/singleflight.py
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+V = TypeVar("V")
+
+
+class SingleFlight(Generic[V]):
+    """
+    Coalesces concurrent calls that share a key: the first caller starts the
+    work, later callers await the same task and get the same result (or the
+    same exception). The key is released as soon as the task finishes.
+
+    Waiters are shielded, so one caller being cancelled (client disconnect)
+    does not cancel the call the others are waiting on.
+    Not thread-safe; meant to be used from the event loop only.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[V]]) -> V:
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # mark the exception as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> dict[str, int]:
+        return {"inflight": len(self._inflight), "calls": self.calls, "coalesced": self.coalesced}
@@ -0,0 +1 @@
+# benchmarks package (run from fastapi-auth/, e.g. `python -m benchmarks.serialization`)
@@ -0,0 +1,150 @@
+# benchmarks/fake_gotrue.py
+"""
+Local stand-in for the Supabase GoTrue endpoints this service calls:
+
+    POST /auth/v1/admin/users
+    DELETE /auth/v1/admin/users/{id}
+    POST /auth/v1/token?grant_type=password|refresh_token
+    POST /auth/v1/signup
+
+Users live in memory. Access tokens are HS256 JWTs signed with the same key
+the app verifies (SUPABASE_JWT_KEY), so /me works against them. Every
+response is delayed by `latency_ms` +/- `jitter_ms` to mimic the network.
+To simulate a degraded upstream, `error_rate` of the requests fail with a
+503 and `slow_rate` of them take an extra `slow_ms`.
+
+    python -m uvicorn benchmarks.fake_gotrue:create_app_from_env --factory --port 9999
+"""
+import asyncio
+import os
+import random
+import secrets
+import time
+import uuid
+
+from jose import jwt
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+class _Unavailable(Exception):
+    pass
+
+
+def create_app(
+    *,
+    jwt_key: str,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    slow_rate: float = 0.0,
+    slow_ms: float = 0.0,
+) -> Starlette:
+    users: dict = {}           # email -> {"id", "password"}
+    refresh_tokens: dict = {}  # refresh token -> user id
+
+    async def delay() -> None:
+        ms = latency_ms + random.uniform(-jitter_ms, jitter_ms) if (latency_ms or jitter_ms) else 0.0
+        if slow_rate and random.random() < slow_rate:
+            ms += slow_ms
+        if ms > 0:
+            await asyncio.sleep(ms / 1000)
+        if error_rate and random.random() < error_rate:
+            raise _Unavailable()
+
+    async def unavailable(request: Request, exc: Exception):
+        return JSONResponse({"code": 503, "msg": "upstream unavailable"}, status_code=503)
+
+    def session_for(user_id: str, email: str) -> dict:
+        now = int(time.time())
+        access = jwt.encode(
+            {"sub": user_id, "email": email, "aud": "authenticated", "role": "authenticated", "iat": now, "exp": now + 3600},
+            jwt_key,
+            algorithm="HS256",
+        )
+        refresh = secrets.token_urlsafe(24)
+        refresh_tokens[refresh] = user_id
+        return {
+            "access_token": access,
+            "token_type": "bearer",
+            "expires_in": 3600,
+            "refresh_token": refresh,
+            "user": {"id": user_id, "email": email},
+        }
+
+    def create_user(email: str, password: str):
+        if email in users:
+            return None
+        user = {"id": str(uuid.uuid4()), "email": email, "password": password}
+        users[email] = user
+        return user
+
+    async def admin_users(request: Request):
+        await delay()
+        body = await request.json()
+        user = create_user(body["email"], body["password"])
+        if user is None:
+            return JSONResponse(
+                {"code": 422, "error_code": "email_exists", "msg": "A user with this email address has already been registered"},
+                status_code=422,
+            )
+        return JSONResponse({"id": user["id"], "email": user["email"]})
+
+    async def admin_delete_user(request: Request):
+        await delay()
+        user_id = request.path_params["user_id"]
+        email = next((e for e, u in users.items() if u["id"] == user_id), None)
+        if email is None:
+            return JSONResponse({"code": 404, "error_code": "user_not_found", "msg": "User not found"}, status_code=404)
+        del users[email]
+        for refresh in [t for t, uid in refresh_tokens.items() if uid == user_id]:
+            del refresh_tokens[refresh]
+        return JSONResponse({})
+
+    async def signup(request: Request):
+        await delay()
+        body = await request.json()
+        user = create_user(body["email"], body["password"])
+        if user is None:
+            return JSONResponse({"code": 422, "error_code": "user_already_exists", "msg": "User already registered"}, status_code=422)
+        return JSONResponse(session_for(user["id"], user["email"]))
+
+    async def token(request: Request):
+        await delay()
+        body = await request.json()
+        grant = request.query_params.get("grant_type")
+        if grant == "password":
+            user = users.get(body.get("email"))
+            if user is None or user["password"] != body.get("password"):
+                return JSONResponse({"error": "invalid_grant", "error_description": "Invalid login credentials"}, status_code=400)
+            return JSONResponse(session_for(user["id"], user["email"]))
+        if grant == "refresh_token":
+            user_id = refresh_tokens.pop(body.get("refresh_token"), None)
+            if user_id is None:
+                return JSONResponse({"error": "invalid_grant", "error_description": "Invalid Refresh Token"}, status_code=400)
+            email = next((u["email"] for u in users.values() if u["id"] == user_id), "")
+            return JSONResponse(session_for(user_id, email))
+        return JSONResponse({"error": "unsupported_grant_type"}, status_code=400)
+
+    return Starlette(
+        routes=[
+            Route("/auth/v1/admin/users", admin_users, methods=["POST"]),
+            Route("/auth/v1/admin/users/{user_id}", admin_delete_user, methods=["DELETE"]),
+            Route("/auth/v1/signup", signup, methods=["POST"]),
+            Route("/auth/v1/token", token, methods=["POST"]),
+        ],
+        exception_handlers={_Unavailable: unavailable},
+    )
+
+
+def create_app_from_env() -> Starlette:
+    return create_app(
+        jwt_key=os.environ["SUPABASE_JWT_KEY"],
+        latency_ms=float(os.environ.get("FAKE_GOTRUE_LATENCY_MS", "0")),
+        jitter_ms=float(os.environ.get("FAKE_GOTRUE_JITTER_MS", "0")),
+        error_rate=float(os.environ.get("FAKE_GOTRUE_ERROR_RATE", "0")),
+        slow_rate=float(os.environ.get("FAKE_GOTRUE_SLOW_RATE", "0")),
+        slow_ms=float(os.environ.get("FAKE_GOTRUE_SLOW_MS", "0")),
+    )
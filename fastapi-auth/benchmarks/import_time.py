@@ -0,0 +1,110 @@
+# benchmarks/import_time.py
+"""
+Cold-start budget check for the Vercel entry point.
+
+Imports `app.server` in a fresh interpreter under `python -X importtime`
+(best of --runs), then fails (exit 1) when:
+  - the cumulative import time exceeds --budget-ms, or regresses more than
+    --tolerance against a saved baseline (--compare NAME), or
+  - a module that must stay lazy (DB driver, passlib, jose, httpx) is
+    imported eagerly.
+
+    python -m benchmarks.import_time --budget-ms 1000
+    python -m benchmarks.import_time --save-baseline main
+    python -m benchmarks.import_time --compare main --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.harness import BENCH_ENV_DEFAULTS
+from benchmarks.load import BASELINE_DIR, _git_commit
+
+ENTRY_POINT = "app.server"
+# Created on first use; importing any of these at startup is a regression
+LAZY_MODULES = ("asyncpg", "passlib", "jose", "httpx", "httpcore", "h2")
+
+
+def _measure() -> tuple[float, dict]:
+    """One fresh-interpreter import. Returns (cumulative_ms, {module: self_ms})."""
+    env = {**BENCH_ENV_DEFAULTS, **os.environ}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {ENTRY_POINT}"],
+        env=env,
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"importing {ENTRY_POINT} failed:\n{proc.stderr[-2000:]}")
+
+    total_ms = None
+    modules: dict = {}
+    after_site = False
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not after_site:
+            # everything up to and including `site` is interpreter start-up (.pth files etc.)
+            after_site = name.strip() == "site"
+            continue
+        modules[name.strip()] = int(self_us) / 1000
+        if name.strip() == ENTRY_POINT:
+            total_ms = int(cumulative_us) / 1000
+    if total_ms is None:
+        raise SystemExit(f"{ENTRY_POINT} not found in -X importtime output")
+    return total_ms, modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="take the fastest of N fresh imports")
+    parser.add_argument("--budget-ms", type=float, help="absolute ceiling for the import of app.server")
+    parser.add_argument("--top", type=int, default=10, help="show the N slowest modules by self time")
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression vs baseline")
+    args = parser.parse_args()
+
+    runs = [_measure() for _ in range(args.runs)]
+    best_ms, modules = min(runs, key=lambda r: r[0])
+    print(f"import {ENTRY_POINT}: best {best_ms:.1f} ms of {args.runs} (all: {', '.join(f'{r[0]:.0f}' for r in runs)} ms)")
+    for name, self_ms in sorted(modules.items(), key=lambda kv: kv[1], reverse=True)[: args.top]:
+        print(f"  {self_ms:8.1f} ms  {name}")
+
+    failures = []
+    eager = sorted({name.split(".")[0] for name in modules} & set(LAZY_MODULES))
+    if eager:
+        failures.append(f"imported at startup but must be lazy: {', '.join(eager)}")
+    if args.budget_ms is not None and best_ms > args.budget_ms:
+        failures.append(f"{best_ms:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"import_time-{args.compare}.json").read_text())
+        limit = baseline["best_ms"] * (1 + args.tolerance)
+        if best_ms > limit:
+            failures.append(
+                f"{best_ms:.1f} ms vs baseline {baseline['best_ms']:.1f} ms ({baseline['commit']}), "
+                f"limit {limit:.1f} ms at tolerance {args.tolerance:.0%}"
+            )
+
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"import_time-{args.save_baseline}.json"
+        path.write_text(json.dumps({"commit": _git_commit(), "best_ms": round(best_ms, 3)}, indent=2) + "\n")
+        print(f"baseline saved: {path}")
+
+    if failures:
+        print("FAIL:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
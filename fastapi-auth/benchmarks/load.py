@@ -0,0 +1,310 @@
+# benchmarks/load.py
+"""
+Load / latency benchmark for /register, /login and /me.
+
+Runs against `app.server:app` either in-process (httpx ASGITransport, the app
+and the load generator share one event loop) or through a real uvicorn
+process. GoTrue is replaced by benchmarks.fake_gotrue with configurable
+latency; the DB is either the in-memory stand-in or a real Postgres
+(--db postgres, uses DATABASE_URL; the schema must already exist).
+
+    python -m benchmarks.load --mode inprocess --duration 10 --concurrency 32
+    python -m benchmarks.load --mode uvicorn --gotrue-latency-ms 40 --save-baseline main
+    python -m benchmarks.load --compare main --tolerance 0.15   # exit 1 on regression
+
+Reports requests/s, p50/p95/p99 latency, error count and event-loop lag per
+scenario. Baselines are JSON files under benchmarks/baselines/.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from time import perf_counter
+
+from benchmarks.harness import LoopLagMonitor, apply_env_defaults, percentile
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+SCENARIOS = ("register", "login", "me")
+PASSWORD = "bench-password-1"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class InProcessTarget:
+    def __init__(self, args):
+        import httpx
+        from benchmarks.fake_gotrue import create_app as create_fake_gotrue
+        from benchmarks.harness import create_bench_app
+        import app.services.supabase_auth as supabase_auth
+
+        self.app = create_bench_app()
+        fake = create_fake_gotrue(
+            jwt_key=os.environ["SUPABASE_JWT_KEY"],
+            latency_ms=args.gotrue_latency_ms,
+            jitter_ms=args.gotrue_jitter_ms,
+            error_rate=args.gotrue_error_rate,
+            slow_rate=args.gotrue_slow_rate,
+            slow_ms=args.gotrue_slow_ms,
+        )
+        # route the service's shared GoTrue client to the fake, in-process
+        supabase_auth._http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake))
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app), base_url="http://bench", timeout=60)
+        self.monitor = LoopLagMonitor()
+
+    async def start(self) -> None:
+        self.monitor.start()
+
+    async def reset_loop_lag(self) -> None:
+        self.monitor.reset()
+
+    async def loop_lag(self) -> dict:
+        return self.monitor.summary()
+
+    async def stop(self) -> None:
+        self.monitor.stop()
+        await self.client.aclose()
+
+
+class UvicornTarget:
+    def __init__(self, args):
+        import httpx
+
+        self.args = args
+        self.gotrue_port = _free_port()
+        self.app_port = _free_port()
+        self.procs: list = []
+        self.client = httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{self.app_port}",
+            timeout=60,
+            limits=httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2),
+        )
+
+    def _spawn(self, target: str, port: int, env: dict) -> None:
+        cmd = [sys.executable, "-m", "uvicorn", target, "--factory", "--port", str(port), "--log-level", "warning"]
+        self.procs.append(subprocess.Popen(cmd, env=env, cwd=Path(__file__).parent.parent))
+
+    async def _wait_ready(self, url: str) -> None:
+        import httpx
+
+        async with httpx.AsyncClient() as c:
+            for _ in range(200):
+                try:
+                    await c.get(url)
+                    return
+                except httpx.TransportError:
+                    await asyncio.sleep(0.05)
+        raise RuntimeError(f"server did not start: {url}")
+
+    async def start(self) -> None:
+        env = dict(os.environ)
+        env["FAKE_GOTRUE_LATENCY_MS"] = str(self.args.gotrue_latency_ms)
+        env["FAKE_GOTRUE_JITTER_MS"] = str(self.args.gotrue_jitter_ms)
+        env["FAKE_GOTRUE_ERROR_RATE"] = str(self.args.gotrue_error_rate)
+        env["FAKE_GOTRUE_SLOW_RATE"] = str(self.args.gotrue_slow_rate)
+        env["FAKE_GOTRUE_SLOW_MS"] = str(self.args.gotrue_slow_ms)
+        env["SUPABASE_URL"] = f"http://127.0.0.1:{self.gotrue_port}"
+        self._spawn("benchmarks.fake_gotrue:create_app_from_env", self.gotrue_port, env)
+        self._spawn("benchmarks.harness:create_bench_app", self.app_port, env)
+        await self._wait_ready(f"http://127.0.0.1:{self.gotrue_port}/")
+        await self._wait_ready(f"http://127.0.0.1:{self.app_port}/health")
+
+    async def reset_loop_lag(self) -> None:
+        await self.client.get("/__bench/loop-lag", params={"reset": "true"})
+
+    async def loop_lag(self) -> dict:
+        return (await self.client.get("/__bench/loop-lag")).json()
+
+    async def stop(self) -> None:
+        await self.client.aclose()
+        for proc in self.procs:
+            proc.terminate()
+        for proc in self.procs:
+            proc.wait(timeout=10)
+
+
+async def _run_scenario(target, name: str, request, concurrency: int, duration: float) -> dict:
+    latencies: list = []
+    errors = 0
+    deadline = perf_counter() + duration
+
+    async def worker(worker_id: int) -> None:
+        nonlocal errors
+        n = 0
+        while perf_counter() < deadline:
+            start = perf_counter()
+            try:
+                ok = await request(worker_id, n)
+            except Exception:
+                ok = False
+            latencies.append(perf_counter() - start)
+            if not ok:
+                errors += 1
+            n += 1
+
+    await target.reset_loop_lag()
+    started = perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = perf_counter() - started
+    lag = await target.loop_lag()
+
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "loop_lag": lag,
+    }
+
+
+async def run(args) -> dict:
+    target = InProcessTarget(args) if args.mode == "inprocess" else UvicornTarget(args)
+    await target.start()
+    client = target.client
+    try:
+        # seed accounts for the login / me scenarios
+        users = [f"seed-{uuid.uuid4().hex[:12]}@bench.example" for _ in range(args.users)]
+        sem = asyncio.Semaphore(8)
+
+        async def seed(email: str) -> None:
+            async with sem:
+                r = await client.post("/api/v1/auth/register", json={"email": email, "password": PASSWORD, "name": "Seed"})
+                r.raise_for_status()
+
+        await asyncio.gather(*(seed(e) for e in users))
+        tokens = []
+        for email in users:
+            r = await client.post("/api/v1/auth/login", json={"email": email, "password": PASSWORD})
+            r.raise_for_status()
+            tokens.append(r.json()["data"]["token"]["access_token"])
+
+        async def register(worker_id: int, n: int) -> bool:
+            email = f"bench-{worker_id}-{n}-{uuid.uuid4().hex[:8]}@bench.example"
+            r = await client.post("/api/v1/auth/register", json={"email": email, "password": PASSWORD})
+            return r.status_code == 201
+
+        async def login(worker_id: int, n: int) -> bool:
+            email = users[(worker_id + n) % len(users)]
+            r = await client.post("/api/v1/auth/login", json={"email": email, "password": PASSWORD})
+            return r.status_code == 200
+
+        async def me(worker_id: int, n: int) -> bool:
+            token = tokens[(worker_id + n) % len(tokens)]
+            r = await client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"})
+            return r.status_code == 200
+
+        handlers = {"register": register, "login": login, "me": me}
+        results = {}
+        for name in args.scenarios:
+            results[name] = await _run_scenario(target, name, handlers[name], args.concurrency, args.duration)
+            _print_row(name, results[name])
+        return results
+    finally:
+        await target.stop()
+
+
+def _print_row(name: str, r: dict) -> None:
+    lag = r["loop_lag"]
+    print(
+        f"{name:>9}  {r['rps']:9.1f} req/s  p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  "
+        f"p99 {r['p99_ms']:8.2f} ms  errors {r['errors']:5d}  loop-lag p99 {lag['p99_ms']:.2f} ms max {lag['max_ms']:.2f} ms",
+        flush=True,
+    )
+
+
+def _compare(baseline: dict, results: dict, tolerance: float) -> list:
+    regressions = []
+    for name, current in results.items():
+        base = baseline["results"].get(name)
+        if not base:
+            continue
+        if base["rps"] and current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']} -> {current['rps']}")
+        for key in ("p95_ms", "p99_ms"):
+            if base[key] and current[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {base[key]} -> {current[key]}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of register,login,me")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--users", type=int, default=50, help="seeded accounts for login/me")
+    parser.add_argument("--gotrue-latency-ms", type=float, default=30.0)
+    parser.add_argument("--gotrue-jitter-ms", type=float, default=5.0)
+    parser.add_argument("--gotrue-error-rate", type=float, default=0.0, help="fraction of GoTrue calls answered with 503")
+    parser.add_argument("--gotrue-slow-rate", type=float, default=0.0, help="fraction of GoTrue calls delayed by --gotrue-slow-ms")
+    parser.add_argument("--gotrue-slow-ms", type=float, default=0.0)
+    parser.add_argument("--db", choices=("standin", "postgres"), default="standin")
+    parser.add_argument("--db-latency-ms", type=float, default=1.0, help="per-call delay of the stand-in DB")
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args()
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    apply_env_defaults()
+    os.environ["BENCH_DB"] = args.db
+    os.environ["BENCH_DB_LATENCY_MS"] = str(args.db_latency_ms)
+
+    results = asyncio.run(run(args))
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": int(time.time()),
+            "mode": args.mode,
+            "db": args.db,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "gotrue_latency_ms": args.gotrue_latency_ms,
+            "gotrue_error_rate": args.gotrue_error_rate,
+            "gotrue_slow_rate": args.gotrue_slow_rate,
+            "db_latency_ms": args.db_latency_ms,
+        },
+        "results": results,
+    }
+
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save_baseline}.json"
+        path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"baseline saved: {path}")
+
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())
+        regressions = _compare(baseline, results, args.tolerance)
+        if regressions:
+            print(f"REGRESSION vs {args.compare} ({baseline['meta']['commit']}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"no regression vs {args.compare} ({baseline['meta']['commit']}) at tolerance {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
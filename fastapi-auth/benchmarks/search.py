@@ -0,0 +1,196 @@
+# benchmarks/search.py
+"""
+Latency of GET /api/v1/profiles/search (CRUDProfile.search) on a large profiles table.
+
+Needs a real Postgres (DATABASE_URL) with the schema in place. Seeds --rows
+synthetic profiles (emails @search-bench.test, kept between runs), makes sure
+pg_trgm and the model's search indexes exist, then times the query for a
+few kinds of search term:
+
+  exact    - one specific user (email fragment)
+  name     - a common first name (~2% of rows match)
+  phone    - a phone number prefix
+  miss     - nothing matches
+  broad    - the seeded email domain, every row matches (worst case: all
+             matches are ranked before LIMIT)
+
+    python -m benchmarks.search --rows 1000000
+    python -m benchmarks.search --no-index          # same queries with index scans disabled
+    python -m benchmarks.search --save-baseline main
+    python -m benchmarks.search --compare main --tolerance 0.25
+    python -m benchmarks.search --drop-seed         # delete the seeded rows
+"""
+import argparse
+import asyncio
+import json
+import sys
+from time import perf_counter
+
+from benchmarks.harness import apply_env_defaults, percentile
+from benchmarks.load import BASELINE_DIR, _git_commit
+
+SEED_DOMAIN = "search-bench.test"
+FIRST_NAMES = (
+    "olivia", "liam", "emma", "noah", "amelia", "oliver", "ava", "elijah", "sophia", "mateo",
+    "isabella", "lucas", "mia", "levi", "evelyn", "asher", "harper", "james", "luna", "leo",
+    "camila", "grayson", "gianna", "ezra", "elizabeth", "luca", "eleanor", "ethan", "ella", "aiden",
+    "abigail", "wyatt", "sofia", "sebastian", "avery", "jack", "scarlett", "daniel", "emily", "hudson",
+    "aria", "benjamin", "penelope", "henry", "chloe", "michael", "layla", "alexander", "mila", "jackson",
+)
+LAST_NAMES = (
+    "smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis", "rodriguez", "martinez",
+    "hernandez", "lopez", "gonzalez", "wilson", "anderson", "thomas", "taylor", "moore", "jackson", "martin",
+    "lee", "perez", "thompson", "white", "harris", "sanchez", "clark", "ramirez", "lewis", "robinson",
+    "walker", "young", "allen", "king", "wright", "scott", "torres", "nguyen", "hill", "flores",
+    "green", "adams", "nelson", "baker", "hall", "rivera", "campbell", "mitchell", "carter", "roberts",
+)
+EXACT_ROW = 424242
+TERMS = {
+    "exact": f"{FIRST_NAMES[EXACT_ROW % len(FIRST_NAMES)]}.{LAST_NAMES[(EXACT_ROW // len(FIRST_NAMES)) % len(LAST_NAMES)]}.{EXACT_ROW}@",
+    "name": "olivia",
+    "phone": "+1555042",
+    "miss": "zzqxjv",
+    "broad": SEED_DOMAIN,
+}
+
+
+def _seed_sql(rows: int) -> str:
+    # row i -> "<First> <Last>", first.last.i@search-bench.test, +1555<i:07d>
+    firsts = "ARRAY[" + ",".join(f"'{n}'" for n in FIRST_NAMES) + "]"
+    lasts = "ARRAY[" + ",".join(f"'{n}'" for n in LAST_NAMES) + "]"
+    return f"""
+        INSERT INTO profiles (id, full_name, email, phone, role, onboarded)
+        SELECT gen_random_uuid(),
+               initcap(f) || ' ' || initcap(l),
+               f || '.' || l || '.' || i || '@{SEED_DOMAIN}',
+               '+1555' || lpad(i::text, 7, '0'),
+               NULL, false
+        FROM generate_series(1, {rows}) AS i,
+             LATERAL (SELECT ({firsts})[1 + i % {len(FIRST_NAMES)}] AS f,
+                             ({lasts})[1 + (i / {len(FIRST_NAMES)}) % {len(LAST_NAMES)}] AS l) AS names
+        ON CONFLICT DO NOTHING
+    """
+
+
+async def prepare(rows: int) -> None:
+    from sqlalchemy import DDL, text
+    from app.db.session import get_engine
+    from app.models.profile import Profile
+
+    engine = get_engine()
+    async with engine.begin() as conn:
+        await conn.execute(DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        seeded = (await conn.execute(
+            text("SELECT count(*) FROM profiles WHERE email LIKE :pattern"), {"pattern": f"%@{SEED_DOMAIN}"}
+        )).scalar_one()
+        if seeded < rows:
+            print(f"seeding {rows - seeded} profiles ...", flush=True)
+            started = perf_counter()
+            # dropping and re-creating the search indexes is much faster than maintaining them per row
+            for index in Profile.__table__.indexes:
+                if index.name and index.name.endswith("_trgm"):
+                    await conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+            await conn.execute(text(
+                f"DELETE FROM profiles WHERE email LIKE '%@{SEED_DOMAIN}'"
+            ))
+            await conn.execute(text(_seed_sql(rows)))
+            print(f"  seeded in {perf_counter() - started:.1f}s", flush=True)
+        started = perf_counter()
+        await conn.run_sync(lambda sync_conn: [index.create(sync_conn, checkfirst=True) for index in Profile.__table__.indexes])
+        await conn.execute(text("ANALYZE profiles"))
+        print(f"indexes ready in {perf_counter() - started:.1f}s", flush=True)
+
+
+async def drop_seed() -> None:
+    from sqlalchemy import text
+    from app.db.session import get_engine
+
+    async with get_engine().begin() as conn:
+        res = await conn.execute(text(f"DELETE FROM profiles WHERE email LIKE '%@{SEED_DOMAIN}'"))
+        print(f"deleted {res.rowcount} seeded profiles")
+
+
+async def measure(iterations: int, limit: int, use_index: bool, explain: bool) -> dict:
+    from sqlalchemy import text
+    from app.crud.profile import crud_profile
+    from app.db.session import get_sessionmaker
+
+    results = {}
+    async with get_sessionmaker()() as db:
+        if not use_index:
+            await db.execute(text("SET enable_bitmapscan = off"))
+            await db.execute(text("SET enable_indexscan = off"))
+        for kind, term in TERMS.items():
+            hits = len(await crud_profile.search(db, term, limit=limit))  # warm-up
+            timings = []
+            for _ in range(iterations):
+                started = perf_counter()
+                await crud_profile.search(db, term, limit=limit)
+                timings.append(perf_counter() - started)
+            ordered = sorted(timings)
+            results[kind] = {
+                "term": term,
+                "hits": hits,
+                "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+            }
+        if explain:
+            plan = await db.execute(text(
+                "EXPLAIN SELECT id FROM profiles WHERE full_name ILIKE :p OR email ILIKE :p OR phone ILIKE :p"
+            ), {"p": f"%{TERMS['name']}%"})
+            print("\n".join(row[0] for row in plan))
+        await db.rollback()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="seeded profiles to search over")
+    parser.add_argument("--iterations", type=int, default=50, help="timed queries per search term")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--no-index", action="store_true", help="disable index scans (sequential-scan comparison)")
+    parser.add_argument("--explain", action="store_true", help="print the plan of the 'name' query")
+    parser.add_argument("--drop-seed", action="store_true")
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative p95 regression vs baseline")
+    args = parser.parse_args()
+
+    apply_env_defaults()
+    if args.drop_seed:
+        asyncio.run(drop_seed())
+        return
+
+    async def run() -> dict:
+        await prepare(args.rows)
+        return await measure(args.iterations, args.limit, not args.no_index, args.explain)
+
+    results = asyncio.run(run())
+    print(f"{'kind':8} {'term':>20} {'hits':>5} {'p50 ms':>9} {'p95 ms':>9}")
+    for kind, r in results.items():
+        print(f"{kind:8} {r['term']:>20} {r['hits']:>5} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f}")
+
+    failures = []
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"search-{args.compare}.json").read_text())
+        for kind, r in results.items():
+            before = baseline["results"].get(kind)
+            if before and r["p95_ms"] > before["p95_ms"] * (1 + args.tolerance):
+                failures.append(f"{kind}: p95 {r['p95_ms']:.2f} ms vs baseline {before['p95_ms']:.2f} ms ({baseline['commit']})")
+
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"search-{args.save_baseline}.json"
+        payload = {"commit": _git_commit(), "rows": args.rows, "no_index": args.no_index, "results": results}
+        path.write_text(json.dumps(payload, indent=2) + "\n")
+        print(f"baseline saved: {path}")
+
+    if failures:
+        print("FAIL:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/serialization.py
+"""
+Per-response serialization cost of the login payload (ApiResponse[AuthData]).
+
+    python -m benchmarks.serialization [--number 20000]
+
+"before" reproduces the old handler path: AuthData(...).model_dump(mode="json")
+wrapped in ApiResponse[T](...).model_dump(mode="json") and encoded by the
+stdlib-json JSONResponse. "after" is ok(AuthData(...)) rendered by ApiJSONResponse.
+"""
+import argparse
+import timeit
+from typing import TypeVar
+
+from fastapi.responses import JSONResponse
+
+from benchmarks.harness import apply_env_defaults
+
+# app.core.config builds Settings at import, so the defaults must be in place first
+apply_env_defaults()
+
+from app.models.enums import UserRole  # noqa: E402
+from app.schemas.profile import AuthData, ProfileOut, Token  # noqa: E402
+from app.schemas.response import ApiResponse  # noqa: E402
+from app.utils.responses import ApiJSONResponse, ok  # noqa: E402
+
+T = TypeVar("T")
+
+PROFILE = ProfileOut(
+    id="0b7f7a4e-3c5e-4c1e-9a55-5b1f1d2c9e10",
+    name="Jane Trainer",
+    email="jane@example.com",
+    phone="+15555550100",
+    user_type=UserRole.trainer,
+    is_active=True,
+)
+TOKEN = Token(access_token="a" * 600, refresh_token="r" * 40)
+
+
+def before() -> bytes:
+    data = AuthData(token=TOKEN, profile=PROFILE).model_dump(mode="json")
+    envelope = ApiResponse[T](success=True, code=200, message="Success", data=data)
+    return JSONResponse(status_code=200, content=envelope.model_dump(mode="json")).body
+
+
+def after() -> bytes:
+    return ApiJSONResponse(status_code=200, content=ok(AuthData(token=TOKEN, profile=PROFILE))).body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    import json
+    assert json.loads(before()) == json.loads(after()), "payloads differ"
+
+    results = {}
+    for name, fn in (("before", before), ("after", after)):
+        best = min(timeit.repeat(fn, number=args.number, repeat=5))
+        results[name] = best / args.number * 1e6
+        print(f"{name:>6}: {results[name]:8.2f} us/response")
+    print(f"speedup: {results['before'] / results['after']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/standin_db.py
+"""
+In-memory replacement for the CRUDProfile methods on the register/login/me
+paths, for benchmarking without Postgres. Each call sleeps `latency_ms` to
+stand in for a DB round trip. Upstream (GoTrue) calls are still made.
+"""
+import asyncio
+from typing import List, Optional
+
+from app.crud.profile import ProfileAlreadyExistsError, ProfileSnapshot
+from app.schemas.profile import AuthData, ProfileOut, Token
+from app.services.supabase_auth import signup_and_get_tokens
+
+
+class InMemoryProfiles:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.by_id: dict = {}
+        self.by_email: dict = {}
+
+    async def _round_trip(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def get_by_id(self, db, id: str, include: frozenset = frozenset()) -> Optional[ProfileSnapshot]:
+        await self._round_trip()
+        return self.by_id.get(id)
+
+    async def get_by_email(self, db, email: str, *, retry_miss: bool = True) -> Optional[ProfileSnapshot]:
+        await self._round_trip()
+        return self.by_email.get(email)
+
+    async def get_many_by_ids(self, db, ids: List[str], include: frozenset = frozenset()) -> List[Optional[ProfileSnapshot]]:
+        await self._round_trip()
+        return [self.by_id.get(i) for i in ids]
+
+    async def create_profile_with_role(
+        self, db, *, name, email, plain_password, hashed_password, phone, user_type,
+        trainer_fields=None, client_fields=None,
+    ) -> AuthData:
+        sess = await signup_and_get_tokens(
+            email=email,
+            password=plain_password,
+            full_name=name,
+            phone=phone,
+            role=(user_type.value if user_type else None),
+        )
+        await self._round_trip()
+        if email in self.by_email:
+            raise ProfileAlreadyExistsError(email)
+        snap = ProfileSnapshot(
+            id=sess.user_id, name=name, email=email,
+            password=(hashed_password if sess.access_token else None),
+            phone=phone, user_type=user_type, is_active=False,
+        )
+        self.by_id[snap.id] = snap
+        self.by_email[email] = snap
+        return AuthData(
+            token=(Token(access_token=sess.access_token, refresh_token=sess.refresh_token) if sess.access_token else None),
+            profile=ProfileOut.model_validate(snap, from_attributes=True),
+        )
+
+
+def install(latency_ms: float = 0.0) -> InMemoryProfiles:
+    """Shadow the methods of the shared `crud_profile` instance with the in-memory store."""
+    from app.crud.profile import crud_profile
+
+    store = InMemoryProfiles(latency_ms)
+    for name in ("get_by_id", "get_by_email", "get_many_by_ids", "create_profile_with_role"):
+        setattr(crud_profile, name, getattr(store, name))
+    return store